@@ -1 +1,9 @@
-from . import cogs, custom, errors, typings, utils
+from ._lazy import lazy_module
+
+__all__ = ("cogs", "custom", "errors", "typings", "utils")
+# submodules are only imported once first accessed, so importing the
+# package alone never pulls in every cog
+__getattr__, __dir__ = lazy_module(
+    __name__,
+    {name: f".{name}" for name in __all__}
+)
@@ -0,0 +1,24 @@
+import importlib
+import sys
+
+
+# kept apart from utils, which would import discord with the package
+def lazy_module(name: str, exports: dict):
+    # exports resolve on first access, so importing one of them never
+    # pays for the dependencies of the others; an export named after
+    # its own module is that module
+    def __getattr__(attribute):
+        if attribute not in exports:
+            raise AttributeError(f"module {name!r} has no attribute "
+                                 f"{attribute!r}")
+        path = exports[attribute]
+        value = module = importlib.import_module(path, name)
+
+        if path != f".{attribute}":
+            value = getattr(module, attribute)
+        vars(sys.modules[name])[attribute] = value
+        return value
+
+    def __dir__():
+        return sorted({*vars(sys.modules[name]), *exports})
+    return __getattr__, __dir__
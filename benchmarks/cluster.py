@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+from typing import List
+
+from base import custom
+from base.benchmarks import fakes
+from base.custom.cluster import shard_ranges
+
+CONTROLLER = -1
+
+
+def run_worker(cluster_id: int, shard_ids: List[int], shard_count: int,
+               clusters: int, path: str, messages: int):
+    async def main():
+        # the controller is on the bus too, though it answers nothing
+        ipc = custom.IPCClient(path, cluster_id, clusters=clusters + 1)
+        bot = fakes.make_bot(custom.AutoShardedBot, command_prefix="!",
+                             shard_ids=shard_ids, shard_count=shard_count,
+                             ipc=ipc)
+        bot.load_base_extensions(exclude=("jishaku.py",))
+        channel = fakes.add_guild(bot, members=10).text_channels[0]
+
+        async def status(data):
+            return {"shutdown": bot.shutdown, "shards": shard_ids}
+
+        ipc.add_handler("status", status)
+
+        for _ in range(messages):
+            await bot.on_message(fakes.make_message(bot, channel, "!public"))
+
+        while not bot.is_closed():
+            await asyncio.sleep(0.05)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_until_complete(main())
+    finally:
+        fakes.cancel_pending(loop)
+        loop.close()
+
+
+async def wait_for_clusters(controller, clusters: int, attempts: int = 60):
+    for _ in range(attempts):
+        statuses = await controller.request("status")
+
+        if len(statuses) == clusters:
+            return statuses
+    return statuses
+
+
+async def run(args, path: str):
+    failures = []
+    server = custom.IPCServer(path)
+    context = multiprocessing.get_context("spawn")
+    processes = []
+
+    await server.start()
+
+    for cluster_id, shard_ids in enumerate(shard_ranges(args.shards,
+                                                        args.clusters)):
+        process = context.Process(
+            target=run_worker,
+            args=(cluster_id, list(shard_ids), args.shards, args.clusters,
+                  path, args.messages)
+        )
+        process.start()
+        processes.append(process)
+    controller = custom.IPCClient(path, CONTROLLER,
+                                  clusters=args.clusters + 1, timeout=1.0)
+    await controller.connect()
+    statuses = await wait_for_clusters(controller, args.clusters)
+    shards = sorted(s for status in statuses for s in status["shards"])
+
+    if shards != list(range(args.shards)):
+        failures.append(f"clusters own shards {shards}")
+    # give every cluster the time to handle its messages
+    await asyncio.sleep(1)
+    metrics = custom.CommandMetrics()
+
+    for reply in await controller.request("metrics"):
+        if reply:
+            metrics.merge(reply)
+    counted = metrics.commands.get("public", None)
+    expected = args.clusters * args.messages
+
+    if counted is None or counted.count != expected:
+        failures.append(f"aggregated {counted and counted.count} "
+                        f"invocations, expected {expected}")
+    await controller.broadcast("shutdown", shutdown=True)
+    statuses = await controller.request("status")
+
+    if not all(status["shutdown"] for status in statuses):
+        failures.append("shutdown did not reach every cluster")
+
+    for reply in await controller.request("reload", extensions=["testing"]):
+        if reply:
+            failures.append(f"reload failed with {reply}")
+    await controller.broadcast("close")
+    loop = asyncio.get_running_loop()
+
+    # joining on the loop would stop the relay forwarding the close
+    for process in processes:
+        await loop.run_in_executor(None, process.join, 10)
+
+        if process.exitcode != 0:
+            failures.append(f"{process.name} exited with {process.exitcode}")
+            process.terminate()
+    await controller.close()
+    await server.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run clusters of stub bots on a local IPC bus"
+    )
+    parser.add_argument("--clusters", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=6)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cluster.sock")
+        failures = asyncio.run(run(args, path))
+
+    for failure in failures:
+        print(f"[x] {failure}")
+    print(f"{args.clusters} clusters, {args.shards} shards: "
+          f"{'failed' if failures else 'passed'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import inspect
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from base.benchmarks import fakes
+from base.custom import loop as loops
+
+BASELINES = Path(__file__).parent / "baselines"
+CHATTER = ("lol", "anyone around?", "brb", "that was a good game",
+           "has anyone seen the patch notes", "gm", "ok")
+COMMANDS = ("!public", "!prefix", "!help", "!help public")
+ALIASES = ("!dl https://example.com/file", "!get", "!test subcommand")
+TYPOS = ("!pub", "!pre", "!publ", "!he")
+# weights for chatter, commands, aliases, typos and mentions
+MIX = (80, 8, 4, 4, 4)
+
+
+class Result(object):
+    __slots__ = ("name", "latencies", "elapsed", "allocated")
+
+    def __init__(self, name: str, latencies: List[float], elapsed: float):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.allocated = 0.0
+
+    def __str__(self):
+        return (f"{self.name:<14}{self.per_second:>12,.0f}/s"
+                f"{self.p50 * 1e6:>10.1f}us{self.p99 * 1e6:>10.1f}us"
+                f"{self.allocated:>12.1f}")
+
+    def _percentile(self, q: float):
+        index = min(int(q * len(self.latencies)), len(self.latencies) - 1)
+        return self.latencies[index]
+
+    @property
+    def per_second(self):
+        return len(self.latencies) / self.elapsed
+
+    @property
+    def p50(self):
+        return self._percentile(0.5)
+
+    @property
+    def p99(self):
+        return self._percentile(0.99)
+
+    def to_dict(self):
+        return {
+            "per_second": self.per_second,
+            "p50": self.p50,
+            "p99": self.p99,
+            "allocated": self.allocated
+        }
+
+
+async def _call(handler: Callable, item: Any):
+    result = handler(item)
+
+    if inspect.isawaitable(result):
+        await result
+
+
+async def measure(name: str, handler: Callable, items: Sequence,
+                  sample: int = 1000):
+    latencies = []
+    started = time.perf_counter()
+
+    for item in items:
+        began = time.perf_counter()
+        await _call(handler, item)
+        latencies.append(time.perf_counter() - began)
+    result = Result(name, latencies, time.perf_counter() - started)
+    sampled = items[:sample]
+    allocated = 0
+
+    # a separate, shorter pass, as tracing slows everything down
+    tracemalloc.start()
+
+    for item in sampled:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        await _call(handler, item)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    result.allocated = allocated / max(len(sampled), 1)
+    return result
+
+
+def build_stream(bot, channel, size: int, seed: int):
+    rng = random.Random(seed)
+    mention = f"<@{bot.user.id}>"
+    pools = (CHATTER, COMMANDS, ALIASES, TYPOS,
+             (mention, f"{mention} help", f"{mention} prefix"))
+    authors = [fakes.user_payload() for _ in range(50)]
+    stream = []
+
+    for pool in rng.choices(pools, weights=MIX, k=size):
+        stream.append(fakes.make_message(bot, channel, rng.choice(pool),
+                                         author=rng.choice(authors)))
+    return stream
+
+
+def make_errors(size: int):
+    errors = []
+
+    for index in range(size):
+        try:
+            # a handful of distinct tracebacks, recurring like a storm
+            if index % 4 == 0:
+                {}["missing"]
+            elif index % 4 == 1:
+                int("nan")
+            else:
+                raise RuntimeError("storm")
+        except Exception as error:
+            errors.append(error)
+    return errors
+
+
+async def run(args) -> Dict[str, Result]:
+    owner = fakes.user_payload()
+    bot = fakes.make_bot(command_prefix="!", owner_id=int(owner["id"]))
+    bot.load_base_extensions(exclude=("jishaku.py",))
+    bot.mentions = (f"<@{bot.user.id}>", f"<@!{bot.user.id}>")
+    guild = fakes.add_guild(bot, members=args.members)
+    channel = guild.text_channels[0]
+    # replies are also sent where the bot's own member is not cached
+    uncached = fakes.add_guild(bot, members=args.members, me=False)
+    stream = build_stream(bot, channel, args.messages, args.seed)
+    commands = [m for m in stream if bot.get_command(m.content[1:])]
+    owned = [fakes.make_message(bot, destination, "!public", author=owner)
+             for destination in (channel, uncached.text_channels[0])
+             for _ in range(50)]
+    # replying to the same messages again goes through the edit cache
+    owned_contexts = [await bot.get_context(m) for m in owned]
+    owned_contexts *= max(args.messages // len(owned_contexts), 1)
+    help_messages = [fakes.make_message(bot, channel, "!help")
+                     for _ in range(min(args.messages, 5000))]
+    error_handler = bot.get_cog("ErrorHandler")
+    typos = [t[1:] for t in TYPOS] * (args.messages // len(TYPOS))
+    matcher = bot._prefix_matchers.get(await bot.get_prefix(stream[0]))
+
+    results = [
+        await measure("dispatch", bot.on_message, stream),
+        await measure("commands", bot.on_message, commands or stream[:1]),
+        await measure("prefix", matcher.match, [m.content for m in stream]),
+        await measure("autocomplete", bot._command_index.complete, typos),
+        await measure("send", lambda ctx: ctx.send("pong"), owned_contexts),
+        await measure("help", bot.on_message, help_messages),
+        await measure("errors",
+                      lambda e: error_handler.output(e, channel),
+                      make_errors(args.messages))
+    ]
+    await bot.close()
+    return {result.name: result for result in results}
+
+
+def compare(results: Dict[str, Result], baseline: dict, tolerance: float):
+    regressions = []
+
+    for name, result in results.items():
+        previous = baseline.get(name, None)
+
+        if previous is None:
+            continue
+        elif result.per_second < previous["per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput "
+                               f"{previous['per_second']:,.0f}/s -> "
+                               f"{result.per_second:,.0f}/s")
+        elif result.p99 > previous["p99"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {previous['p99'] * 1e6:.1f}us "
+                               f"-> {result.p99 * 1e6:.1f}us")
+    return regressions
+
+
+def run_on(name: str, args) -> Dict[str, Result]:
+    loop = loops.create_loop(use_uvloop=name == "uvloop")
+
+    try:
+        return loop.run_until_complete(run(args))
+    finally:
+        fakes.cancel_pending(loop)
+        loop.close()
+
+
+def print_results(results: Dict[str, Result]):
+    print(f"{'case':<14}{'throughput':>14}{'p50':>12}{'p99':>12}"
+          f"{'B/msg':>12}")
+
+    for result in results.values():
+        print(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the message dispatch hot path offline"
+    )
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--members", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default="dispatch",
+                        help="name of the baseline file to use")
+    parser.add_argument("--save", action="store_true",
+                        help="save these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--loop", default="asyncio",
+                        choices=("asyncio", "uvloop", "compare"),
+                        help="compare runs both, without any baseline")
+    args = parser.parse_args()
+
+    if args.loop != "asyncio" and loops.uvloop is None:
+        parser.error("uvloop is not installed")
+
+    if args.loop == "compare":
+        stock = run_on("asyncio", args)
+        fast = run_on("uvloop", args)
+
+        for name, results in (("asyncio", stock), ("uvloop", fast)):
+            print(f"{name}:")
+            print_results(results)
+            print()
+
+        for name, result in fast.items():
+            speedup = result.per_second / stock[name].per_second
+            print(f"{name:<14}{speedup:>13.2f}x")
+        return
+    results = run_on(args.loop, args)
+    path = BASELINES / f"{args.baseline}.json"
+
+    print_results(results)
+
+    if args.save:
+        BASELINES.mkdir(exist_ok=True)
+        payload = {name: r.to_dict() for name, r in results.items()}
+        path.write_text(json.dumps(payload, indent=4))
+        print(f"\nSaved baseline to {path}")
+    elif path.exists():
+        regressions = compare(results, json.loads(path.read_text()),
+                              args.tolerance)
+
+        for regression in regressions:
+            print(f"[x] Regressed {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
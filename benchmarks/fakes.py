@@ -0,0 +1,242 @@
+import asyncio
+import itertools
+from collections import Counter
+from typing import Counter as CounterType, Tuple
+
+import discord
+
+from base import custom
+
+TIMESTAMP = "2021-01-01T00:00:00+00:00"
+MESSAGE_ROUTES = ("/channels/{channel_id}/messages",
+                  "/channels/{channel_id}/messages/{message_id}")
+MESSAGE_METHODS = ("GET", "POST", "PATCH")
+APPLICATION_ROUTE = "/oauth2/applications/@me"
+_snowflakes = itertools.count(100000000000000000)
+
+
+def snowflake():
+    return str(next(_snowflakes))
+
+
+def user_payload(user_id: str = None, *, bot: bool = False):
+    user_id = user_id or snowflake()
+
+    return {
+        "id": user_id,
+        "username": f"user{user_id[-6:]}",
+        "discriminator": "0001",
+        "avatar": None,
+        "bot": bot
+    }
+
+
+def member_payload(user: dict):
+    return {
+        "user": user,
+        "roles": [],
+        "joined_at": TIMESTAMP,
+        "deaf": False,
+        "mute": False
+    }
+
+
+def presence_payload(user: dict):
+    return {
+        "user": {"id": user["id"]},
+        "status": "online",
+        "activities": [],
+        "client_status": {"desktop": "online"}
+    }
+
+
+def channel_payload(guild_id: str, position: int = 0):
+    return {
+        "id": snowflake(),
+        "guild_id": guild_id,
+        "type": 0,
+        "name": f"channel-{position}",
+        "position": position,
+        "permission_overwrites": [],
+        "nsfw": False,
+        "topic": None,
+        "last_message_id": None
+    }
+
+
+def guild_payload(*, members: int = 100, channels: int = 5,
+                  owner_id: str = None, guild_id: str = None):
+    guild_id = guild_id or snowflake()
+    users = [user_payload() for _ in range(members)]
+    owner_id = owner_id or users[0]["id"]
+
+    return {
+        "id": guild_id,
+        "name": f"guild-{guild_id[-6:]}",
+        "owner_id": owner_id,
+        "region": "us-west",
+        "afk_timeout": 300,
+        "verification_level": 0,
+        "default_message_notifications": 0,
+        "explicit_content_filter": 0,
+        "mfa_level": 0,
+        "features": [],
+        "emojis": [],
+        "roles": [{
+            "id": guild_id,
+            "name": "@everyone",
+            "permissions": "104324673",
+            "position": 0,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False
+        }],
+        "channels": [channel_payload(guild_id, i) for i in range(channels)],
+        "members": [member_payload(user) for user in users],
+        "presences": [presence_payload(user) for user in users],
+        "voice_states": [],
+        "member_count": members,
+        "large": members > 250
+    }
+
+
+def message_payload(channel: discord.TextChannel, content: str, *,
+                    author: dict = None):
+    author = author or user_payload()
+
+    return {
+        "id": snowflake(),
+        "channel_id": str(channel.id),
+        "guild_id": str(channel.guild.id),
+        "author": author,
+        "member": member_payload(author),
+        "content": content,
+        "timestamp": TIMESTAMP,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0
+    }
+
+
+class StubHTTP(object):
+    def __init__(self, bot):
+        self.bot = bot
+        self.calls: CounterType[Tuple[str, str]] = Counter()
+        self.owner = user_payload()
+
+    def _user_payload(self):
+        user = self.bot.user
+
+        return {
+            "id": str(user.id),
+            "username": user.name,
+            "discriminator": user.discriminator,
+            "avatar": None,
+            "bot": True
+        }
+
+    def _application_payload(self):
+        # owners resolve to a user of their own, never to the bot
+        return {
+            "id": str(self.bot.user.id),
+            "name": self.bot.user.name,
+            "description": "",
+            "icon": None,
+            "rpc_origins": None,
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "owner": self.owner,
+            "summary": "",
+            "verify_key": ""
+        }
+
+    def _message_payload(self, route, data: dict):
+        # fetched messages keep the id they were requested by
+        message_id = snowflake()
+
+        if route.method == "GET":
+            message_id = route.url.rsplit("/", 1)[-1]
+
+        return {
+            "id": message_id,
+            "channel_id": str(route.channel_id),
+            "author": self._user_payload(),
+            "content": data.get("content") or "",
+            "timestamp": TIMESTAMP,
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [data["embed"]] if data.get("embed") else [],
+            "pinned": False,
+            "type": 0
+        }
+
+    async def request(self, route, **kwargs):
+        self.calls[(route.method, route.path)] += 1
+        data = kwargs.get("json", None) or {}
+
+        # sending, fetching and editing messages, and application info
+        # are the only routes whose responses are parsed
+        if route.path in MESSAGE_ROUTES and route.method in MESSAGE_METHODS:
+            return self._message_payload(route, data)
+
+        if route.path == APPLICATION_ROUTE:
+            return self._application_payload()
+        return {}
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+
+def make_bot(cls=None, **options):
+    options.setdefault("silent", True)
+    bot = (cls or custom.Bot)(**options)
+    state = bot._connection
+    state.user = discord.ClientUser(state=state,
+                                    data=user_payload(bot=True))
+    bot.stub_http = StubHTTP(bot)
+    bot.http.request = bot.stub_http.request
+    return bot
+
+
+def cancel_pending(loop: asyncio.AbstractEventLoop):
+    # tasks such as Owner.__ainit__ wait on a ready that never comes
+    pending = asyncio.all_tasks(loop)
+
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending,
+                                           return_exceptions=True))
+
+
+def add_guild(bot, *, me: bool = True, **options) -> discord.Guild:
+    state = bot._connection
+    data = guild_payload(**options)
+
+    # without its own member, guild.me and ctx.me are None
+    if me:
+        data["members"].append(member_payload(bot.stub_http._user_payload()))
+    return state._add_guild_from_data(data)
+
+
+def make_message(bot, channel: discord.TextChannel, content: str,
+                 **options) -> discord.Message:
+    data = message_payload(channel, content, **options)
+    return discord.Message(state=bot._connection, channel=channel, data=data)
+
+
+def dispatch_event(bot, event: str, data: dict):
+    # what the gateway does with a dispatch, minus the websocket
+    bot.dispatch("socket_response", {"op": 0, "t": event, "d": data})
+    bot._connection.parsers[event](data)
@@ -0,0 +1,81 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = ROOT.name
+# modules that should never be imported as a side effect of the target
+FORBIDDEN = ("jishaku", f"{PACKAGE}.cogs")
+
+
+def measure(code: str) -> List[Tuple[str, int, int]]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT.parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    imports = []
+
+    # import time: self [us] | cumulative | imported package
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, module = line[12:].split("|")
+        imports.append((module.strip(), int(self_time), int(cumulative)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail when importing the package exceeds its budget"
+    )
+    # the package itself resolves its exports lazily, so importing it
+    # alone costs nothing; what matters is getting at the bot
+    parser.add_argument("statement", nargs="?",
+                        default=f"from {PACKAGE}.custom import Bot")
+    parser.add_argument("--budget", type=float, default=400.0,
+                        help="cumulative import time budget in ms")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # modules imported by the interpreter itself are not ours to count
+    startup = {module for module, _, _ in measure("pass")}
+    runs = [measure(args.statement) for _ in range(args.runs)]
+    # the fastest run is the least disturbed by everything else
+    imports = min(runs, key=lambda run: sum(t for _, t, _ in run))
+    modules: Dict[str, Tuple[int, int]] = {
+        module: (self_time, cumulative)
+        for module, self_time, cumulative in imports
+        if module not in startup
+    }
+    total = sum(self_time for self_time, _ in modules.values()) / 1000
+    forbidden = [module for module in modules
+                 if module.startswith(FORBIDDEN)]
+    slowest = sorted(modules.items(), key=lambda item: item[1][0],
+                     reverse=True)
+
+    print(f"{args.statement}: {total:.1f}ms "
+          f"(budget {args.budget:.1f}ms, {len(modules)} modules)\n")
+
+    for module, (self_time, cumulative) in slowest[:args.top]:
+        print(f"{self_time / 1000:>9.2f}ms {cumulative / 1000:>9.2f}ms  "
+              f"{module}")
+    failed = False
+
+    if forbidden:
+        print(f"\n[x] Forbidden imports: {(', ').join(forbidden)}")
+        failed = True
+
+    if total > args.budget:
+        print(f"\n[x] Over budget by {total - args.budget:.1f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+import discord
+
+from base import custom, utils
+from base.benchmarks import fakes
+
+
+def measure(profile: custom.Profile, guilds: int, members: int,
+            messages: int):
+    gc.collect()
+    tracemalloc.start()
+    bot = fakes.make_bot(profile=profile)
+    state = bot._connection
+    baseline = tracemalloc.take_snapshot()
+
+    for _ in range(guilds):
+        guild = fakes.add_guild(bot, members=members)
+        channel = guild.text_channels[0]
+
+        # mirrors what parse_message_create keeps around
+        if state._messages is not None:
+            for _ in range(messages):
+                message = fakes.make_message(bot, channel, "chatter")
+                state._messages.append(message)
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    statistics = snapshot.compare_to(baseline, "filename")
+    size = sum(stat.size_diff for stat in statistics)
+    cached_members = sum(len(guild.members) for guild in bot.guilds)
+    bot.loop.run_until_complete(bot.close())
+    return size, cached_members
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the memory held by each intents profile"
+    )
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    print(f"{args.guilds} guilds x {args.members} members, "
+          f"{args.messages} messages per guild\n")
+    print(f"{'profile':<16}{'memory':>14}{'members cached':>18}")
+    results = {}
+
+    for name, profile in custom.PROFILES.items():
+        size, cached_members = measure(profile, args.guilds, args.members,
+                                       args.messages)
+        results[name] = (size, cached_members)
+        print(f"{name:<16}{utils.format_size(size):>14}"
+              f"{cached_members:>18}")
+    failures = []
+
+    # every profile past full has to hold less than the one before it
+    names = list(results)
+
+    for larger, smaller in zip(names, names[1:]):
+        if results[smaller][0] >= results[larger][0]:
+            failures.append(f"{smaller} holds no less memory than {larger}")
+
+        if results[smaller][1] > results[larger][1]:
+            failures.append(f"{smaller} caches more members than {larger}")
+
+    # a caller's own intents decide what the profile may cache
+    try:
+        bot = fakes.make_bot(intents=discord.Intents.default())
+        bot.loop.run_until_complete(bot.close())
+    except ValueError as error:
+        failures.append(f"custom intents fail to construct: {error}")
+
+    for failure in failures:
+        print(f"[x] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import List
+
+import discord
+from discord.client import _ClientEventTask
+
+from base.benchmarks import fakes
+from base.custom.recorder import read_events
+
+LAG_INTERVAL = 0.01
+# parsing READY would wait on chunking and resolve owners over HTTP
+SKIPPED = ("READY", "RESUMED")
+
+
+def speed(value: str):
+    if value == "max":
+        return 0.0
+    return float(value.rstrip("x"))
+
+
+def percentile(values: List[float], q: float):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def sample_lag(lags: List[float]):
+    loop = asyncio.get_running_loop()
+
+    while True:
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(loop.time() - expected, 0.0))
+
+
+async def drain(before, timeout: float):
+    # only what the client scheduled for listeners, not background
+    # loops such as the error reporters' flushers
+    pending = {t for t in asyncio.all_tasks() - before
+               if isinstance(t, _ClientEventTask)}
+
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+
+
+async def replay(args):
+    bot = fakes.make_bot(command_prefix=args.prefix, profile=args.profile)
+    bot.load_base_extensions(exclude=("jishaku.py",))
+    state = bot._connection
+    loop = asyncio.get_running_loop()
+    events = Counter()
+    failed = Counter()
+    lags: List[float] = []
+    sampler = loop.create_task(sample_lag(lags))
+    before = asyncio.all_tasks()
+    started = loop.time()
+
+    for elapsed, event, data in read_events(args.path):
+        if event == "READY":
+            state.user = discord.ClientUser(state=state, data=data["user"])
+            bot.mentions = (f"<@{state.user.id}>", f"<@!{state.user.id}>")
+        parser = state.parsers.get(event, None)
+
+        if parser is None or event in SKIPPED:
+            continue
+
+        if args.speed:
+            delay = elapsed / args.speed - (loop.time() - started)
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        try:
+            parser(data)
+        except Exception:
+            failed[event] += 1
+        events[event] += 1
+        # handlers are scheduled as tasks, let them run between events
+        await asyncio.sleep(0)
+    await drain(before, args.timeout)
+    processed = loop.time() - started
+    # debounced work, such as edit reprocessing, runs on timers
+    await asyncio.sleep(args.settle)
+    await drain(before, args.timeout)
+    sampler.cancel()
+    await bot.close()
+    return events, failed, lags, processed, bot.stub_http
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded gateway event stream offline"
+    )
+    parser.add_argument("path", help="a recording made with record_events")
+    parser.add_argument("--speed", type=speed, default=0.0,
+                        help="1x, 10x or max (default)")
+    parser.add_argument("--prefix", default="!")
+    parser.add_argument("--profile", default="commands-only")
+    parser.add_argument("--settle", type=float, default=1.5,
+                        help="seconds to wait for debounced handlers")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    began = time.perf_counter()
+    events, failed, lags, processed, http = loop.run_until_complete(
+        replay(args)
+    )
+    total = sum(events.values())
+
+    print(f"Replayed {total:,} events in {processed:.2f}s "
+          f"({total / max(processed, 1e-9):,.0f}/s, "
+          f"{time.perf_counter() - began:.2f}s wall)")
+    print(f"Loop lag: p50 {percentile(lags, 0.5) * 1000:.2f}ms, "
+          f"p99 {percentile(lags, 0.99) * 1000:.2f}ms, "
+          f"max {max(lags, default=0.0) * 1000:.2f}ms\n")
+
+    for event, count in events.most_common(args.top):
+        errors = f" ({failed[event]} failed)" if failed[event] else ""
+        print(f"{count:>10,}  {event}{errors}")
+    print(f"\n{http.total:,} REST calls")
+
+    for (method, path), count in http.calls.most_common(args.top):
+        print(f"{count:>10,}  {method} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import random
+import sys
+from collections import Counter
+
+from base import custom
+from base.benchmarks import fakes
+
+
+async def run(args):
+    owner = fakes.user_payload()
+    bot = fakes.make_bot(custom.AutoShardedBot, command_prefix="!",
+                         shard_count=args.shards, owner_id=int(owner["id"]))
+    bot.load_base_extensions(exclude=("jishaku.py",))
+    rng = random.Random(args.seed)
+    # a guild's shard comes from its creation time, which sequential
+    # snowflakes share, so each guild is created a millisecond later
+    base = int(fakes.snowflake())
+    guilds = [fakes.add_guild(bot, members=10, guild_id=str(base + (i << 22)))
+              for i in range(args.guilds)]
+    expected = Counter()
+    started = []
+    failures = []
+
+    async def gated():
+        await bot.wait_until_ready()
+        started.append(set(bot.shards_ready))
+
+    waiter = asyncio.create_task(gated())
+    # the client is ready as soon as the first shard is, in some
+    # versions of discord.py, so that alone should not open the gate
+    bot._ready.set()
+
+    for shard_id in range(args.shards):
+        await asyncio.sleep(0)
+
+        if started:
+            failures.append(f"when_ready ran with only shards "
+                            f"{sorted(started[0])} ready")
+            break
+        bot.dispatch("shard_ready", shard_id)
+    await asyncio.wait_for(waiter, timeout=5)
+
+    for _ in range(args.events):
+        guild = rng.choice(guilds)
+        channel = rng.choice(guild.text_channels)
+        data = fakes.message_payload(channel, rng.choice(("hi", "!help")))
+        expected[(guild.id >> 22) % args.shards] += 1
+
+        fakes.dispatch_event(bot, "MESSAGE_CREATE", data)
+        await asyncio.sleep(0)
+    await bot.default_display()
+
+    if len(expected) < min(args.shards, args.guilds):
+        failures.append(f"events only reached shards {sorted(expected)}")
+
+    if bot.shard_events != expected:
+        failures.append(f"counted {dict(bot.shard_events)}, "
+                        f"expected {dict(expected)}")
+    await bot.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive an AutoShardedBot through a fake gateway"
+    )
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--guilds", type=int, default=40)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    failures = loop.run_until_complete(run(args))
+
+    for failure in failures:
+        print(f"[x] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
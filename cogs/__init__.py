@@ -1,4 +1,10 @@
-from .error_handler import ErrorHandler
-from .information import Information
-from .owner import Owner
-from .testing import Testing
+from base._lazy import lazy_module
+
+_exports = {
+    "ErrorHandler": ".error_handler",
+    "Information": ".information",
+    "Owner": ".owner",
+    "Testing": ".testing"
+}
+__all__ = tuple(_exports)
+__getattr__, __dir__ = lazy_module(__name__, _exports)
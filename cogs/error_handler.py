@@ -1,4 +1,3 @@
-import contextlib
 import sys
 from typing import Optional, Set, Text, Tuple, Union
 
@@ -18,12 +17,27 @@ class ErrorHandler(custom.Cog):
             commands.CheckFailure
         ))
         self.ignored_commands: Set[Text] = kwargs.get("commands", set())
+        self.reporter = custom.ErrorReporter(
+            self.format_exception,
+            window=kwargs.get("window", 10.0),
+            budget=kwargs.get("budget", 5)
+        )
+        # stalls get their own, stricter budget, so a struggling loop
+        # is not kept busy reporting on itself
+        self.stall_reporter = custom.ErrorReporter(
+            self.format_stall,
+            fingerprint=lambda stall: stall.fingerprint,
+            window=kwargs.get("stall_window", 60.0),
+            budget=kwargs.get("stall_budget", 1)
+        )
 
         self._original_on_error = self.bot.on_error
         self.bot.on_error = self.on_error
 
     def cog_unload(self):
         self.bot.on_error = self._original_on_error
+        self.reporter.close()
+        self.stall_reporter.close()
 
     async def _error_base(self, error, *, ctx=None):
         error = getattr(error, "original", error)
@@ -46,10 +60,27 @@ class ErrorHandler(custom.Cog):
             return False
         return isinstance(error, self.ignored_errors)
 
+    def _format_tail(self, lines, header: str = ""):
+        # the end of a traceback says the most, the rest is attached
+        shown, overflow = utils.paginate_overflow(
+            lines,
+            limit=self.reporter.limit - 64 - len(header),
+            tail=True
+        )
+
+        if overflow is None:
+            return header + shown[0]
+        return f"{header}(full traceback attached)\n{shown[0]}", overflow
+
     @overwritable
     def format_exception(self, error):
-        message = utils.format_exception(error)
-        return utils.codeblock(message)
+        return self._format_tail(utils.iter_exception(error))
+
+    @overwritable
+    def format_stall(self, stall: custom.LoopStall):
+        if not stall.stack:
+            return str(stall)
+        return self._format_tail(stall.stack, header=f"{stall}\n")
 
     @overwritable
     async def get_destination(self,
@@ -58,10 +89,6 @@ class ErrorHandler(custom.Cog):
         message = getattr(initial, "message", initial)
 
         if isinstance(message, discord.Message):
-            ctx = await self.bot.get_context(message)
-
-            if ctx and ctx.valid:
-                return ctx
             return message.channel
         return default
 
@@ -69,12 +96,9 @@ class ErrorHandler(custom.Cog):
     async def output(self,
                      error,
                      destination: Optional[Destination] = None):
-        formatted = self.format_exception(error)
-        embed = discord.Embed(description=formatted)
-
+        # reports are coalesced per traceback and sent in batches
         if destination:
-            with contextlib.suppress(discord.HTTPException):
-                await destination.send(embed=embed)
+            self.reporter.report(error, destination)
 
     @overwritable
     async def on_base_error(self, error: Exception):
@@ -93,11 +117,19 @@ class ErrorHandler(custom.Cog):
     async def on_command_error(self, ctx, error):
         await self._error_base(error, ctx=ctx)
 
+    @commands.Cog.listener()
+    async def on_loop_stall(self, stall: custom.LoopStall):
+        destination = await self.get_destination(stall,
+                                                 default=self.bot.error_log)
+
+        if destination:
+            self.stall_reporter.report(stall, destination)
+
     @commands.Cog.listener()
     async def on_startup_error(self, error):
         await self.bot.wait_for_display()
-        message = utils.format_exception(error)
-        print(message, file=sys.stderr)
+        for line in utils.iter_exception(error):
+            print(line, end="", file=sys.stderr)
 
 
 def setup(bot):
@@ -1,21 +1,24 @@
-from os.path import basename
-from urllib.parse import urlparse
-from typing import Dict
+import asyncio
+import copy
+from typing import Dict, Optional, Set, Union
 
-import aiofiles
 import discord
 from discord.ext import commands
 
-from base import custom
+from base import custom, utils
 
 
 class Owner(custom.Cog, hidden=True):
     def __init__(self, bot, **kwargs):
         self.bot = bot
 
-        self._original_get_context = self.bot.get_context
-        self.bot.get_context = self.get_context
+        self._pending_edits: Dict[int, asyncio.TimerHandle] = {}
+        self._reprocessing: Set[asyncio.Task] = set()
         self.invite_url: str = None
+        self.edit_delay: float = kwargs.get("edit_delay", 1.0)
+        self.downloader = custom.Downloader(
+            concurrency=kwargs.get("download_concurrency", 4)
+        )
         self.reactions: Dict[bool, str] = kwargs.get("reactions", {
             True: "\U0001f44e",
             False: "\U0001f44d"
@@ -31,10 +34,15 @@ class Owner(custom.Cog, hidden=True):
         )
 
     def cog_unload(self):
-        self.bot.get_context = self._original_get_context
+        for handle in self._pending_edits.values():
+            handle.cancel()
+        self._pending_edits.clear()
+
+        for task in self._reprocessing:
+            task.cancel()
 
     async def cog_check(self, ctx):
-        return await self.bot.is_owner(ctx.author)
+        return await self.bot.owners.is_owner(ctx.author)
 
     async def cog_before_invoke(self, ctx):
         if ctx.command.name == "close":
@@ -45,9 +53,6 @@ class Owner(custom.Cog, hidden=True):
         emoji = self.reactions.get(ctx.command_failed)
         await ctx.message.add_reaction(emoji)
 
-    async def get_context(self, message, *, cls=custom.Context):
-        return await self._original_get_context(message, cls=cls)
-
     async def _attempt_fetch(self, payload):
         channel_found = self.bot.get_channel(payload.channel_id)
 
@@ -55,26 +60,122 @@ class Owner(custom.Cog, hidden=True):
             return None
         return await channel_found.fetch_message(payload.message_id)
 
+    def _rebuild_message(self, payload) -> Optional[discord.Message]:
+        cached = payload.cached_message
+        channel_found = self.bot.get_channel(payload.channel_id)
+
+        if not channel_found:
+            return None
+        elif "author" in payload.data:
+            return discord.Message(state=self.bot._connection,
+                                   channel=channel_found,
+                                   data=payload.data)
+        elif cached:
+            message = copy.copy(cached)
+            message._update(payload.data)
+            return message
+        return None
+
+    def _schedule_edit(self,
+                       message_id: int,
+                       edited: Union[discord.Message,
+                                     discord.RawMessageUpdateEvent]):
+        # only the final revision of rapidly edited messages is kept
+        handle = self._pending_edits.pop(message_id, None)
+
+        if handle:
+            handle.cancel()
+        self._pending_edits[message_id] = self.bot.loop.call_later(
+            self.edit_delay,
+            self._flush_edit,
+            message_id,
+            edited
+        )
+
+    def _flush_edit(self, message_id: int, edited):
+        self._pending_edits.pop(message_id, None)
+        # referenced until done, so it is neither collected nor silent
+        task = self.bot.loop.create_task(self._reprocess(edited))
+        task.add_done_callback(self._reprocessed)
+
+        self._reprocessing.add(task)
+
+    def _reprocessed(self, task: asyncio.Task):
+        self._reprocessing.discard(task)
+
+        if not task.cancelled() and task.exception():
+            self.bot.log(f"[!] Failed to reprocess an edit: "
+                         f"{utils.format_exception(task.exception())}")
+
+    async def _reprocess(self, edited):
+        if isinstance(edited, discord.RawMessageUpdateEvent):
+            try:
+                edited = await self._attempt_fetch(edited)
+            except discord.HTTPException:
+                return
+
+        if edited:
+            await self.bot.process_commands(edited)
+
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload):
-        message_found = await self._attempt_fetch(payload)
+        content = payload.data.get("content", None)
+        cached = payload.cached_message
+
+        # embed resolution and pins also dispatch edits
+        if content is None or (cached and cached.content == content):
+            return
+        message_found = self._rebuild_message(payload)
 
-        if message_found:
-            await self.bot.process_commands(message_found)
+        if message_found is None:
+            self._schedule_edit(payload.message_id, payload)
+        elif not self.bot.rejects(message_found):
+            self._schedule_edit(payload.message_id, message_found)
 
     @commands.command(aliases=["dl", "get"])
     async def download(self, ctx, *urls):
-        for url in urls:
-            async with self.bot.session.get(url) as response:
-                parsed = urlparse(url)
-                filename = basename(parsed.path)
+        results = await self.downloader.download_many(self.bot.session, urls)
+        total = sum(result.size for result in results)
+        summary = ("\n").join(map(str, results))
 
-                async with aiofiles.open(f"downloads/{filename}", "wb") as f:
-                    chunk = await response.content.read(1024)
+        await ctx.send(f"{summary}\nTotal: {utils.format_size(total)}")
 
-                    while chunk:
-                        await f.write(chunk)
-                        chunk = await response.content.read(1024)
+    @commands.command()
+    async def metrics(self, ctx, count: int = 10):
+        metrics = await self.bot.gather_metrics()
+        timed = sorted(metrics.commands.items(),
+                       key=lambda item: item[1].count,
+                       reverse=True)
+
+        if not timed:
+            return await ctx.send("No commands have been timed yet")
+        lag = self.bot.loop_monitor.stats()
+        lines = [f"loop lag p50 {lag['p50'] * 1000:.1f}ms, "
+                 f"p99 {lag['p99'] * 1000:.1f}ms, "
+                 f"{lag['stalls']} stalls"]
+
+        if self.bot.send_queue:
+            queued = self.bot.send_queue.stats()
+            lines.append(f"send queue depth {queued['depth']}, "
+                         f"wait p50 {queued['wait_p50'] * 1000:.0f}ms, "
+                         f"p99 {queued['wait_p99'] * 1000:.0f}ms, "
+                         f"{queued['coalesced']} coalesced")
+        lines += ["",
+                  f"{'command':<20}{'calls':>7}{'errors':>8}"
+                  f"{'p50':>10}{'p99':>10}  slowest stage"]
+
+        for name, stats in timed[:count]:
+            p50 = stats.latency.quantile(0.5) * 1000
+            p99 = stats.latency.quantile(0.99) * 1000
+            slowest = max(stats.stages,
+                          key=lambda stage: stats.stages[stage].mean)
+
+            lines.append(f"{name:<20}{stats.count:>7}"
+                         f"{stats.error_rate:>8.1%}{p50:>8.1f}ms"
+                         f"{p99:>8.1f}ms  {slowest}")
+        pages, file = utils.paginate_to_file(("\n").join(lines), language="",
+                                             filename="metrics.txt")
+        await ctx.send(pages[0], file=file)
 
     @commands.command()
     async def invite(self, ctx):
@@ -84,8 +185,27 @@ class Owner(custom.Cog, hidden=True):
     async def clear(self, ctx):
         await self.bot.display()
 
+    @commands.command()
+    async def reload(self, ctx, *extensions):
+        failed = self.bot.reload_extensions(extensions)
+
+        if self.bot.ipc:
+            replies = await self.bot.ipc.request("reload",
+                                                 extensions=extensions)
+
+            for reply in replies:
+                failed.update(reply or {})
+
+        if failed:
+            summary = (f"{name}: {error}\n"
+                       for name, error in failed.items())
+            pages, file = utils.paginate_to_file(summary, language="",
+                                                 filename="reload.txt")
+            await ctx.send(pages[0], file=file)
+
     @commands.command()
     async def close(self, ctx):
+        await self.bot.broadcast("close")
         await self.bot.close()
 
 
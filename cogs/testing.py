@@ -27,6 +27,7 @@ class Testing(custom.Cog):
         """
         self.bot.shutdown = True
 
+        await self.bot.broadcast("shutdown", shutdown=True)
         await ctx.send(f"{self.bot.user.name} has been locally shutdown")
 
 
@@ -1,5 +1,32 @@
-from ._bot import Bot
-from .cog import Cog
-from .context import Context
-from .embed import Embed, Field
-from .help_command import HelpCommand
+from base._lazy import lazy_module
+
+_exports = {
+    "AutoShardedBot": "._sharded",
+    "Bot": "._bot",
+    "Cluster": ".cluster",
+    "Cog": ".cog",
+    "Context": ".context",
+    "Downloader": ".downloader",
+    "DownloadResult": ".downloader",
+    "EditCache": ".edit_cache",
+    "EventRecorder": ".recorder",
+    "Embed": ".embed",
+    "Field": ".embed",
+    "ErrorReporter": ".error_reporter",
+    "LazyExtension": ".extensions",
+    "LoopMonitor": ".loop_monitor",
+    "LoopStall": ".loop_monitor",
+    "HelpCommand": ".help_command",
+    "IPCClient": ".ipc",
+    "IPCServer": ".ipc",
+    "CommandMetrics": ".metrics",
+    "Histogram": ".metrics",
+    "OwnerResolver": ".owners",
+    "PrefixStore": ".prefix_store",
+    "PROFILES": ".profiles",
+    "Profile": ".profiles",
+    "SendQueue": ".send_queue",
+    "WebClient": ".web"
+}
+__all__ = tuple(_exports)
+__getattr__, __dir__ = lazy_module(__name__, _exports)
@@ -1,18 +1,35 @@
 import asyncio
 import contextlib
-import copy
+import inspect
 import os
-from collections import OrderedDict
+import sqlite3
+import time
 from collections.abc import Iterable
 from pathlib import Path
 from types import ModuleType
 from typing import Dict, List, Tuple
 
-import aiohttp
 import discord
 from discord.ext import commands
+from discord.ext.commands.view import StringView
 
 from .cog import Cog
+from .command_index import CommandIndex
+from .context import Context
+from .edit_cache import EditCache
+from .extensions import LazyExtension
+from .ipc import IPCClient
+from .loop import create_loop, describe_loop
+from .loop_monitor import LoopMonitor, LoopStall
+from .metrics import CommandMetrics, CommandTimer
+from .owners import OwnerResolver
+from .pipeline import MessagePipeline
+from .prefix import PrefixMatcherCache
+from .profiles import get_profile
+from .prefix_store import PrefixStore
+from .recorder import EventRecorder
+from .send_queue import SendQueue
+from .web import WebClient
 from base import errors
 from base import utils
 from base.typings import overwritable
@@ -20,7 +37,30 @@ from base.typings import overwritable
 
 class Bot(commands.Bot):
     def __init__(self, *args, **kwargs):
-        kwargs.setdefault("intents", discord.Intents.all())
+        self.prefix_store: PrefixStore = kwargs.pop("prefix_store", None)
+        self.profile = get_profile(kwargs.pop("profile", "full"))
+        loop_options = {
+            "use_uvloop": kwargs.pop("uvloop", False),
+            "executor_workers": kwargs.pop("executor_workers", None),
+            "slow_callback_duration": kwargs.pop("slow_callback_duration",
+                                                 None)
+        }
+
+        # the loop has to exist before commands.Bot binds itself to one
+        if any(loop_options.values()) and "loop" not in kwargs:
+            kwargs["loop"] = create_loop(**loop_options)
+
+        # the store's event has to be created once the loop exists
+        if isinstance(self.prefix_store, (str, os.PathLike)):
+            self.prefix_store = PrefixStore(self.prefix_store)
+
+        if self.prefix_store:
+            kwargs.setdefault("command_prefix", self.prefix_store)
+
+        options = self.profile.options(kwargs.get("intents", None))
+
+        for option, value in options.items():
+            kwargs.setdefault(option, value)
         kwargs.setdefault("command_prefix", commands.when_mentioned)
         kwargs.setdefault(
             "allowed_mentions",
@@ -37,27 +77,92 @@ class Bot(commands.Bot):
         self._mystbin = None
         self._on_ready_tasks: List[asyncio.Task] = []
         self._exclusions = ["jishaku"]
-        self._edit_cache: Dict[int, discord.Message] = OrderedDict()
         self._display = asyncio.Event()
-        self._edit_cache_maximum = kwargs.pop("max_edit_messages", 1000)
+        self._command_index = CommandIndex(self)
+        self._prefix_matchers = PrefixMatcherCache()
+        self._mention_prefixes: Tuple[str] = None
+        self._user_before_invoke = None
+        self._user_after_invoke = None
+        self._metrics_runner = None
+
+        # every guild the store caches should keep its matcher cached
+        if self.prefix_store:
+            self._prefix_matchers.maximum = self.prefix_store.maximum
 
         self.shutdown = False
+        self.commands_version = 0
+        self.edit_cache = EditCache(
+            kwargs.pop("max_edit_messages", 1000),
+            ttl=kwargs.pop("edit_cache_ttl", None),
+            max_bytes=kwargs.pop("edit_cache_bytes", None)
+        )
         self.silent = kwargs.pop("silent", False)
         self.home_id: int = kwargs.pop("home", None)
         self.error_log_id: int = kwargs.pop("error_log", None)
         self.mentions: Tuple[str] = None
+        self.pipeline = MessagePipeline(self, (
+            self._mention_help_stage,
+            self._autocomplete_stage,
+            self._invoke_stage
+        ))
         self.base_extensions: Dict[str, ModuleType] = {}
         self.base_cogs: Dict[str, Cog] = {}
-        self.session = aiohttp.ClientSession()
+        self.lazy: bool = kwargs.pop("lazy_extensions", False)
+        self.lazy_extensions: Dict[str, LazyExtension] = {}
+        self.web = WebClient(**kwargs.pop("web_options", {}))
+        self.metrics = CommandMetrics()
+        self.metrics_file: str = kwargs.pop("metrics_file", None)
+        self.metrics_interval: float = kwargs.pop("metrics_interval", 15.0)
+        self.metrics_address: Tuple[str, int] = kwargs.pop(
+            "metrics_address",
+            None
+        )
+        self.loop_monitor: LoopMonitor = None
+        self.stall_threshold: float = kwargs.pop("stall_threshold", 0.25)
+        self.send_queue: SendQueue = kwargs.pop("send_queue", None)
+
+        if self.send_queue is True:
+            self.send_queue = SendQueue()
+        self.recorder: EventRecorder = kwargs.pop("record_events", None)
+        self.ipc: IPCClient = kwargs.pop("ipc", None)
+
+        if isinstance(self.recorder, (str, os.PathLike)):
+            self.recorder = EventRecorder(self.recorder)
         self.permissions: discord.Permissions = kwargs.pop(
             "permissions",
             discord.Permissions()
         )
+        owner_ttl = kwargs.pop("owner_ttl", 3600.0)
 
         super().__init__(*args, **kwargs)
+        self.loop_monitor = LoopMonitor(self.loop,
+                                        threshold=self.stall_threshold,
+                                        callback=self._loop_stalled)
+        self.owners = OwnerResolver(self,
+                                    owner_id=self.owner_id,
+                                    owner_ids=self.owner_ids,
+                                    ttl=owner_ttl)
         self.add_check(self.shutdown_check)
 
-        for coroutine in (self.__ainit__, self.display):
+        # user hooks are chained by before_invoke and after_invoke
+        self._before_invoke = self._timed_before_invoke
+        self._after_invoke = self._timed_after_invoke
+
+        if self.recorder:
+            self.add_listener(self.recorder.on_socket_response)
+
+        if self.ipc:
+            self.ipc.add_handler("close", self._ipc_close)
+            self.ipc.add_handler("shutdown", self._ipc_shutdown)
+            self.ipc.add_handler("reload", self._ipc_reload)
+            self.ipc.add_handler("metrics", self._ipc_metrics)
+
+        startup = (self._connect_ipc, self.__ainit__, self.display,
+                   self._warm_prefixes, self._resolve_owners,
+                   self._check_intents, self._export_metrics,
+                   self.loop_monitor.run)
+
+        for coroutine in startup:
             task = self.loop.create_task(coroutine())
             task.add_done_callback(self._startup_error)
 
@@ -74,6 +179,49 @@ class Bot(commands.Bot):
     async def display(self):
         await self.default_display()
 
+    @utils.when_ready()
+    async def _warm_prefixes(self):
+        if self.prefix_store:
+            await self.prefix_store.start(self)
+
+    @utils.when_ready()
+    async def _resolve_owners(self):
+        await self.owners.resolve()
+
+    @utils.when_ready()
+    async def _check_intents(self):
+        utils.check_intents(self)
+
+        for cog in self.cogs.values():
+            utils.check_intents(self, cog)
+
+    async def _connect_ipc(self):
+        if self.ipc:
+            await self.ipc.connect()
+
+    async def _ipc_close(self, data: dict):
+        await self.close()
+
+    async def _ipc_shutdown(self, data: dict):
+        self.shutdown = data["shutdown"]
+
+    async def _ipc_reload(self, data: dict):
+        return self.reload_extensions(data["extensions"])
+
+    async def _ipc_metrics(self, data: dict):
+        return self.metrics.to_dict()
+
+    @utils.when_ready()
+    async def _export_metrics(self):
+        if self.metrics_address:
+            self._metrics_runner = await self.metrics.serve(
+                *self.metrics_address
+            )
+
+        while self.metrics_file:
+            await self.metrics.write(self.metrics_file)
+            await asyncio.sleep(self.metrics_interval)
+
     @property
     @utils.has_intents(guilds=True)
     def home(self):
@@ -82,7 +230,12 @@ class Bot(commands.Bot):
     @property
     @utils.has_intents(guilds=True)
     def error_log(self):
-        return self.home.get_channel(self.error_log_id)
+        home = self.home
+        return home and home.get_channel(self.error_log_id)
+
+    @property
+    def session(self):
+        return self.web.session
 
     @property
     def mystbin(self):
@@ -90,7 +243,7 @@ class Bot(commands.Bot):
             with contextlib.suppress(ModuleNotFoundError):
                 import mystbin
 
-                self._mystbin = mystbin.Client()
+                self._mystbin = mystbin.Client(session=self.session)
         return self._mystbin
 
     def _startup_error(self, future):
@@ -101,70 +254,108 @@ class Bot(commands.Bot):
         if error is not None:
             self.dispatch("startup_error", error)
 
-    def _strip_prefix(self, content, prefixes):
-        match_found: str = None
-        prefixes = filter(content.startswith, prefixes)
+    def _loop_stalled(self, stall: LoopStall):
+        self.log(f"[!] {stall}")
+        self.dispatch("loop_stall", stall)
 
-        for prefix in prefixes:
-            # in the instance of having multiple, simiar prefixes,
-            # this grabs both a prefix serving as the initial match
-            # and the longest possible prefix able to be matched
-            if not match_found or len(prefix) > len(match_found):
-                match_found = prefix
+    def _get_prefix_matcher_nowait(self, message: discord.Message):
+        prefix = self.command_prefix
 
-        if match_found:
-            return content[len(match_found):]
-        raise ValueError(f'prefix cannot be stripped from "{content}"')
+        if prefix is commands.when_mentioned:
+            if self._mention_prefixes is None and self.user:
+                self._mention_prefixes = tuple(prefix(self, message))
+            prefix = self._mention_prefixes
+        elif callable(prefix):
+            get_nowait = getattr(prefix, "get_nowait", None)
 
-    def _get_edit_cached_message(self, message_id: int):
-        message_found = self._edit_cache.get(message_id, None)
+            if get_nowait is not None:
+                prefix = get_nowait(self, message)
+            elif inspect.iscoroutinefunction(prefix):
+                return None
+            else:
+                # plain functions such as when_mentioned_or's answer
+                # without awaiting, so chatter is rejected right away
+                prefix = prefix(self, message)
 
-        if not message_found:
-            if len(self._edit_cache) == self._edit_cache_maximum:
-                self._edit_cache.popitem(last=False)
-        return message_found
+                if inspect.isawaitable(prefix):
+                    if inspect.iscoroutine(prefix):
+                        prefix.close()
+                    return None
 
-    async def _autocomplete_command(self, message):
-        prefixes = await self.get_prefix(message)
+        if not isinstance(prefix, (str, list, tuple)):
+            return None
+        return self._prefix_matchers.get(prefix)
 
-        if isinstance(prefixes, Iterable) and not isinstance(prefixes, str):
-            prefixes = tuple(prefixes)
+    def rejects(self, message: discord.Message):
+        content = message.content
 
-        if message.content.startswith(prefixes):
-            name = self._strip_prefix(message.content, prefixes)
+        if self.mentions and content in self.mentions:
+            return False
+        matcher = self._get_prefix_matcher_nowait(message)
+        return matcher is not None and matcher.rejects(content)
 
-            if name != "":
-                command_found = self.get_command(name)
+    def _parse(self, ctx: Context, content: str):
+        prefix = None
+        ctx.view = StringView(content)
 
-                if command_found:
-                    ctx = await self.get_context(message)
+        if ctx.prefix_matcher:
+            prefix = ctx.prefix_matcher.match(content)
 
-                    print(f'Autocompleted to "{ctx.command.name}"')
-                    await self.invoke(ctx)
-                    return command_found
-                else:
-                    for command in self.commands:
-                        command_names = (
-                            command.name.lower(),
-                            *command.aliases
-                        )
-
-                        for command_name in command_names:
-                            autocompleted = command_name == name \
-                                or command_name.startswith(name)
-
-                            if autocompleted:
-                                alt_message = copy.copy(message)
-                                alt_content = alt_message.content.replace(
-                                    name,
-                                    command_name
-                                )
-                                alt_message.content = alt_content
-                                ctx = await self.get_context(alt_message)
-
-                                await self.invoke(ctx)
-                                return command
-        return None
+        if prefix is None:
+            ctx.prefix = ctx.invoked_with = ctx.command = None
+            return ctx
+        ctx.view.skip_string(prefix)
+
+        if getattr(self, "strip_after_prefix", False):
+            ctx.view.skip_ws()
+        invoker = ctx.view.get_word()
+        ctx.prefix = prefix
+        ctx.invoked_with = invoker
+        ctx.command = self.all_commands.get(invoker, None)
+        return ctx
+
+    async def _mention_help_stage(self, ctx: Context):
+        content = ctx.message.content
+
+        if self.mentions and content in self.mentions:
+            self._parse(ctx, f"{content} help")
+        return False
+
+    async def _autocomplete_stage(self, ctx: Context):
+        if ctx.prefix is None or ctx.command or not ctx.invoked_with:
+            return False
+        name = ctx.view.buffer[len(ctx.prefix):]
+        completed = self._command_index.complete(name)
+
+        if completed:
+            alt_name, command = completed
+
+            self._parse(ctx, f"{ctx.prefix}{alt_name}")
+            self.log(f'Autocompleted to "{command.qualified_name}"')
+        return False
+
+    async def _timed_before_invoke(self, ctx: Context):
+        timer = getattr(ctx, "timer", None)
+
+        # groups run their hooks again for the invoked subcommand
+        if timer and timer.checks is None:
+            timer.mark("checks")
+
+        if self._user_before_invoke:
+            await self._user_before_invoke(ctx)
+
+    async def _timed_after_invoke(self, ctx: Context):
+        timer = getattr(ctx, "timer", None)
+
+        if timer:
+            timer.mark("callback")
+
+        if self._user_after_invoke:
+            await self._user_after_invoke(ctx)
+
+    async def _invoke_stage(self, ctx: Context):
+        await self.invoke(ctx)
+        return True
 
     def log(self, message):
         if not self.silent:
@@ -177,7 +368,96 @@ class Bot(commands.Bot):
 
         for file in resolved.glob("[!__]*.py"):
             if file.name not in exclude:
-                self.load_extension(f"{repo_name}.cogs.{file.name[:-3]}")
+                name = f"{repo_name}.cogs.{file.name[:-3]}"
+
+                if self.lazy:
+                    self.defer_extension(name, file)
+                else:
+                    self.load_extension(name)
+
+        if self.lazy_extensions:
+            task = self.loop.create_task(self._load_lazy_extensions())
+            task.add_done_callback(self._startup_error)
+
+            self._on_ready_tasks.append(task)
+
+    def defer_extension(self, name: str, path: Path):
+        extension = LazyExtension(name, path)
+        self.lazy_extensions[name] = extension
+
+        for stub in extension.create_stubs(self._invoke_lazy):
+            names = (stub.name, *stub.aliases)
+
+            if not any(n in self.all_commands for n in names):
+                self.add_command(stub)
+        self.log(f"[~] Deferred cog: {name}")
+
+    def load_lazy_extension(self, name: str):
+        extension = self.lazy_extensions.pop(name, None)
+
+        if extension is None:
+            return
+
+        for stub in extension.stubs:
+            if self.all_commands.get(stub.name, None) is stub:
+                self.remove_command(stub.name)
+        self.load_extension(name)
+
+    def _resolve_lazy(self, ctx: Context):
+        # swaps a stub for the real command before it is prepared, so
+        # checks and hooks run once, against the real command
+        extension = getattr(ctx.command, "lazy_extension", None)
+
+        if extension is not None:
+            self.load_lazy_extension(extension.name)
+            self._parse(ctx, ctx.view.buffer)
+
+    async def _invoke_lazy(self, ctx: Context, extension: LazyExtension):
+        self.load_lazy_extension(extension.name)
+        self._parse(ctx, ctx.view.buffer)
+
+        # only reached when the stub is invoked directly, as invoke
+        # resolves it beforehand; the stub is kept when the extension
+        # failed to load or never defined the command
+        if ctx.command and ctx.command not in extension.stubs:
+            try:
+                await ctx.command.invoke(ctx)
+            except commands.CommandError as error:
+                await ctx.command.dispatch_error(ctx, error)
+
+    @utils.when_ready()
+    async def _load_lazy_extensions(self):
+        pending = list(self.lazy_extensions.values())
+
+        await asyncio.gather(*(e.prepare() for e in pending))
+
+        for extension in pending:
+            self.load_lazy_extension(extension.name)
+
+    def _commands_changed(self):
+        self.commands_version += 1
+        self._command_index.invalidate()
+
+    def add_command(self, command):
+        super().add_command(command)
+        self._commands_changed()
+
+    def remove_command(self, name):
+        command = super().remove_command(name)
+        self._commands_changed()
+        return command
+
+    def add_cog(self, cog):
+        super().add_cog(cog)
+        self._commands_changed()
+
+        # cogs added before then are checked once the bot is ready
+        if self.is_ready():
+            utils.check_intents(self, cog)
+
+    def remove_cog(self, name):
+        super().remove_cog(name)
+        self._commands_changed()
 
     def trigger_display(self):
         if not self._display.is_set():
@@ -185,15 +465,24 @@ class Bot(commands.Bot):
 
     async def shutdown_check(self, ctx):
         if self.shutdown:
-            return await self.is_owner(ctx.author)
+            return await self.owners.is_owner(ctx.author)
         return True
 
+    async def is_owner(self, user):
+        await self.owners.resolve()
+        return user.id in self.owners.ids
+
     async def default_display(self):
-        utils.clear_screen()
+        # clearing the screen shells out, blocking until it exits
+        await self.loop.run_in_executor(None, utils.clear_screen)
         print(self.user.name, end="\n\n")
+        self.display_status()
 
         self.trigger_display()
 
+    def display_status(self):
+        pass
+
     async def wait_for_display(self):
         if not self._display.is_set():
             await self._display.wait()
@@ -202,6 +491,7 @@ class Bot(commands.Bot):
     # https://github.com/Rapptz/discord.py/blob/master/discord/ext/commands/bot.py#L603-L609
     def load_extension(self, name):
         method = "[ ] Loaded"
+        started = time.perf_counter()
 
         try:
             super().load_extension(name)
@@ -213,7 +503,46 @@ class Bot(commands.Bot):
             if isinstance(error, commands.ExtensionFailed):
                 error = error.original
             self.dispatch("startup_error", error)
-        self.log(f"{method} cog: {name}")
+        elapsed = (time.perf_counter() - started) * 1000
+        self.log(f"{method} cog: {name} ({elapsed:.2f}ms)")
+
+    def _resolve_extension(self, name: str):
+        if name in self.extensions:
+            return name
+        # short names, such as owner, save typing out the package
+        matches = [n for n in self.extensions if n.endswith(f".{name}")]
+        return matches[0] if len(matches) == 1 else name
+
+    def reload_extensions(self, names: Iterable[str]) -> Dict[str, str]:
+        failed = {}
+
+        for name in names or tuple(self.extensions):
+            name = self._resolve_extension(name)
+
+            try:
+                self.reload_extension(name)
+            except commands.ExtensionError as error:
+                error = getattr(error, "original", error)
+                failed[name] = f"{type(error).__name__}: {error}"
+            else:
+                self.log(f"[ ] Reloaded cog: {name}")
+        return failed
+
+    async def broadcast(self, op: str, **data):
+        # a bot outside of any cluster simply has nobody to tell
+        if self.ipc:
+            await self.ipc.broadcast(op, **data)
+
+    async def gather_metrics(self):
+        if not self.ipc:
+            return self.metrics
+        gathered = CommandMetrics(self.metrics.bounds)
+        gathered.merge(self.metrics.to_dict())
+
+        for reply in await self.ipc.request("metrics"):
+            if reply:
+                gathered.merge(reply)
+        return gathered
 
     def run(self, token=None, **kwargs):
         path = "./TOKEN"
@@ -225,23 +554,89 @@ class Bot(commands.Bot):
             else:
                 full = os.path.abspath(path)
                 raise errors.TokenFileNotFound(f'{full}" not found')
+        self.log(f"[L] Running on {describe_loop(self.loop)}")
         super().run(token, **kwargs)
 
-    async def on_message(self, message):
-        autocompleted = await self._autocomplete_command(message)
+    # https://github.com/Rapptz/discord.py/blob/master/discord/ext/commands/bot.py#L816-L883
+    async def get_context(self, message, *, cls=Context):
+        ctx = cls(prefix=None, view=StringView(message.content),
+                  bot=self, message=message)
+        ctx.timer = CommandTimer()
 
-        if self.mentions and message.content in self.mentions:
-            alt_message = copy(message)
-            alt_message.content = f"{message.content} help"
-            ctx = await self.get_context(alt_message)
+        if self._skip_check(message.author.id, self.user.id):
+            return ctx
+        prefixes = await self.get_prefix(message)
+        ctx.timer.mark("prefix")
+        ctx.prefix_matcher = self._prefix_matchers.get(prefixes)
+        return self._parse(ctx, message.content)
+
+    async def get_prefix(self, message):
+        matcher = self._get_prefix_matcher_nowait(message)
+
+        if matcher:
+            return matcher.prefixes
+        return await super().get_prefix(message)
+
+    def before_invoke(self, coro):
+        if not asyncio.iscoroutinefunction(coro):
+            raise TypeError("The pre-invoke hook must be a coroutine.")
+        self._user_before_invoke = coro
+        return coro
+
+    def after_invoke(self, coro):
+        if not asyncio.iscoroutinefunction(coro):
+            raise TypeError("The post-invoke hook must be a coroutine.")
+        self._user_after_invoke = coro
+        return coro
+
+    async def invoke(self, ctx):
+        timer = getattr(ctx, "timer", None)
+        self._resolve_lazy(ctx)
+
+        if ctx.command and self.send_queue:
+            # commands wait for a backed up channel, instead of
+            # piling more replies onto it
+            await self.send_queue.wait_for_capacity(ctx.channel.id)
+
+        if ctx.command is None or timer is None:
+            return await super().invoke(ctx)
+        timer.mark("context")
 
-            await self.invoke(ctx)
-        elif not autocompleted:
-            await self.process_commands(message)
+        try:
+            await super().invoke(ctx)
+        finally:
+            command = ctx.command
+
+            self.metrics.observe(command.qualified_name, command.cog_name,
+                                 timer, ctx.command_failed)
+
+    async def process_commands(self, message):
+        await self.pipeline.process(message)
+
+    async def on_message(self, message):
+        await self.pipeline.process(message)
 
     async def close(self):
         for task in self._on_ready_tasks:
             task.cancel()
 
-        await self.session.close()
+        if self.prefix_store:
+            try:
+                await self.prefix_store.close()
+            except sqlite3.Error as error:
+                self.log(f"[!] Failed to flush prefixes: {error}")
+
+        if self.recorder:
+            await self.recorder.close()
+
+        if self.send_queue:
+            self.send_queue.close()
+
+        if self._metrics_runner:
+            await self._metrics_runner.cleanup()
+
+        if self.ipc:
+            await self.ipc.close()
+
+        await self.web.close()
         await super().close()
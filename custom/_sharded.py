@@ -0,0 +1,70 @@
+import asyncio
+from collections import Counter
+from typing import Counter as CounterType, Set
+
+from discord.ext import commands
+
+from ._bot import Bot
+
+GUILD_EVENTS = ("GUILD_CREATE", "GUILD_UPDATE", "GUILD_DELETE")
+
+
+class AutoShardedBot(Bot, commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        self.shards_ready: Set[int] = set()
+        self.shard_events: CounterType[int] = Counter()
+
+        super().__init__(*args, **kwargs)
+        # created once the loop the bot runs on is known
+        self._all_ready = asyncio.Event()
+
+    def _get_shard_id(self, payload: dict):
+        data = payload.get("d", None) or {}
+        guild_id = data.get("guild_id", None)
+
+        if guild_id is None and payload.get("t", None) in GUILD_EVENTS:
+            guild_id = data.get("id", None)
+
+        # direct messages are always received by the first shard
+        if guild_id is None:
+            return 0
+        return (int(guild_id) >> 22) % (self.shard_count or 1)
+
+    def _get_shard_ids(self):
+        return self.shard_ids or range(self.shard_count or 1)
+
+    def _check_all_ready(self):
+        if self.shards_ready.issuperset(self._get_shard_ids()):
+            self._all_ready.set()
+
+    def dispatch(self, event_name, *args, **kwargs):
+        # tracked inline, as a listener would cost a task per event
+        if event_name == "socket_response" and args[0].get("op", None) == 0:
+            self.shard_events[self._get_shard_id(args[0])] += 1
+        elif event_name in ("shard_ready", "shard_resumed"):
+            self.shards_ready.add(args[0])
+            self._check_all_ready()
+        elif event_name == "shard_disconnect":
+            self.shards_ready.discard(args[0])
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def wait_until_ready(self):
+        # when_ready tasks start once, after every shard is ready,
+        # rather than after whichever shard happened to finish first
+        await super().wait_until_ready()
+        await self._all_ready.wait()
+
+    def is_shard_ready(self, shard_id: int):
+        return shard_id in self.shards_ready
+
+    def display_status(self):
+        super().display_status()
+        latencies = dict(self.latencies)
+
+        # shards yet to connect are listed too, without a latency
+        for shard_id in self._get_shard_ids():
+            status = " " if self.is_shard_ready(shard_id) else "x"
+            latency = latencies.get(shard_id, float("nan")) * 1000
+            print(f"[{status}] Shard {shard_id}: {latency:.0f}ms, "
+                  f"{self.shard_events[shard_id]} events")
+        print()
@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import os
+from typing import Dict, List
+
+from ._sharded import AutoShardedBot
+from .ipc import IPCClient, IPCServer
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[range]:
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+
+    # the first clusters take one of any leftover shards each
+    for index in range(clusters):
+        stop = start + size + (index < extra)
+        ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+
+def cluster_options(options: dict, cluster_id: int):
+    options = dict(options)
+    address = options.get("metrics_address", None)
+    path = options.get("metrics_file", None)
+
+    # every cluster exports its own metrics, without clashing
+    if address:
+        host, port = address
+        options["metrics_address"] = (host, port + cluster_id)
+
+    if path:
+        options["metrics_file"] = f"{path}.{cluster_id}"
+    return options
+
+
+def run_cluster(cls: type, options: dict, cluster_id: int,
+                shard_ids: List[int], shard_count: int, clusters: int,
+                path: str, token: str = None):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    ipc = IPCClient(path, cluster_id, clusters=clusters)
+    bot = cls(shard_ids=shard_ids, shard_count=shard_count, ipc=ipc,
+              **cluster_options(options, cluster_id))
+    bot.run(token)
+
+
+class Cluster(object):
+    def __init__(self, cls: type = AutoShardedBot, *,
+                 shard_count: int,
+                 clusters: int = None,
+                 path: str = "cluster.sock",
+                 **options):
+        self.cls = cls
+        self.shard_count = shard_count
+        self.clusters = min(clusters or os.cpu_count() or 1, shard_count)
+        self.path = path
+        self.options = options
+        self.processes: Dict[int, multiprocessing.Process] = {}
+
+        # forking would copy the launcher's loop into every cluster
+        self._context = multiprocessing.get_context("spawn")
+
+    def _spawn(self, cluster_id: int, shard_ids: range, token: str):
+        process = self._context.Process(
+            target=run_cluster,
+            args=(self.cls, self.options, cluster_id, list(shard_ids),
+                  self.shard_count, self.clusters, self.path, token),
+            name=f"cluster-{cluster_id}"
+        )
+        process.start()
+
+        self.processes[cluster_id] = process
+        print(f"[ ] Started cluster {cluster_id}: shards "
+              f"{shard_ids.start}-{shard_ids.stop - 1}")
+
+    async def _supervise(self, token: str):
+        server = IPCServer(self.path)
+        await server.start()
+
+        try:
+            ranges = shard_ranges(self.shard_count, self.clusters)
+
+            for cluster_id, shard_ids in enumerate(ranges):
+                self._spawn(cluster_id, shard_ids, token)
+
+            # the launcher only has to outlive its clusters
+            while any(p.is_alive() for p in self.processes.values()):
+                await asyncio.sleep(1)
+        finally:
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            await server.close()
+
+    def run(self, token: str = None):
+        asyncio.run(self._supervise(token))
@@ -0,0 +1,72 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from base.typings import Command
+
+Level = Tuple[List[str], List[Command]]
+
+
+class CommandIndex(object):
+    def __init__(self, bot):
+        self.bot = bot
+
+        self._levels: Dict[str, Level] = {}
+        self._dirty = True
+
+    def _rebuild(self):
+        staging: Dict[str, Dict[str, Command]] = {}
+
+        for command in self.bot.walk_commands():
+            level = staging.setdefault(command.full_parent_name, {})
+
+            for name in (command.name, *command.aliases):
+                level.setdefault(name, command)
+        self._levels.clear()
+
+        for parent, level in staging.items():
+            names = sorted(level)
+            self._levels[parent] = (names, [level[n] for n in names])
+        self._dirty = False
+
+    def _match(self, level: Level, word: str):
+        names, commands = level
+        index = bisect_left(names, word)
+
+        # an exact match sorts before any longer name sharing its
+        # prefix, so the first candidate is always the best one
+        if index < len(names) and names[index].startswith(word):
+            return names[index], commands[index]
+        return None
+
+    def invalidate(self):
+        self._dirty = True
+
+    def complete(self, text: str) -> Optional[Tuple[str, Command]]:
+        if self._dirty:
+            self._rebuild()
+        command: Command = None
+        completed: List[str] = []
+        parent = ""
+        remainder = text
+
+        while remainder:
+            level = self._levels.get(parent, None)
+
+            if level is None:
+                break
+            word, _, rest = remainder.partition(" ")
+            match_found = word and self._match(level, word)
+
+            if not match_found:
+                break
+            name, command = match_found
+            parent = command.qualified_name
+            remainder = rest
+
+            completed.append(name)
+
+        if command is None:
+            return None
+        elif remainder:
+            completed.append(remainder)
+        return (" ").join(completed), command
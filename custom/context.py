@@ -1,29 +1,87 @@
+import time
+
 import discord
 from discord.ext import commands
 
+from .edit_cache import EditCacheEntry
+from .metrics import CommandTimer
+from .prefix import PrefixMatcher
 from base import utils
 
 
 # https://github.com/platform-discord/travis-bott/blob/master/utils/customcontext.py#L33-L79
 class Context(commands.Context):
+    prefix_matcher: PrefixMatcher = None
+    timer: CommandTimer = None
+
+    UNEDITABLE = ("file", "files")
+    SEND_ONLY = ("tts", "nonce", "reference", "mention_author")
+
+    def _get_cached_reply(self, entry: EditCacheEntry):
+        channel = self.channel
+
+        if channel.id != entry.channel_id:
+            channel = self.bot.get_channel(entry.channel_id)
+
+        if channel is None:
+            return None
+        return channel.get_partial_message(entry.message_id)
+
+    async def _deliver(self, *args, **kwargs):
+        # also tells whether this invocation sent the message itself
+        send_queue = self.bot.send_queue
+
+        if send_queue is None:
+            return await super().send(*args, **kwargs), True
+        pending = send_queue.submit(self.channel.id, super().send,
+                                    *args, **kwargs)
+        message = await pending.future
+        return message, not pending.merged
+
     async def send(self, *args, **kwargs):
+        if self.timer is None:
+            return await self._send(*args, **kwargs)
+        started = time.perf_counter()
+
+        try:
+            return await self._send(*args, **kwargs)
+        finally:
+            self.timer.send += time.perf_counter() - started
+
+    async def _send(self, *args, **kwargs):
         if self.bot.shutdown and not await self.bot.shutdown_check(ctx=self):
             return print("[S] Bot has been locally shutdown")
-        is_owner = await self.bot.is_owner(self.author)
-        message = self.message
+        is_owner = await self.bot.owners.is_owner(self.author)
+        uneditable = any(key in kwargs for key in self.UNEDITABLE)
 
-        if not is_owner:
-            return await super().send(*args, **kwargs)
-        cached = self.bot._get_edit_cached_message(self.message.id)
+        if not is_owner or uneditable:
+            message, _ = await self._deliver(*args, **kwargs)
+            return message
+        edit_cache = self.bot.edit_cache
+        entry = edit_cache.get(self.message.id)
+        cached = entry and self._get_cached_reply(entry)
 
         if cached:
+            fields = {k: v for k, v in kwargs.items()
+                      if k not in self.SEND_ONLY}
+
+            if args:
+                fields["content"] = args[0]
+
             try:
-                await utils.clear_reactions(cached)
-                await cached.edit(**kwargs)
-                self.bot._edit_cache[self.message.id] = cached
+                cleared = await utils.clear_reactions(cached, self.me)
+
+                if not cleared.complete:
+                    self.bot.log(f"[x] Failed to clear "
+                                 f"{len(cleared.failed)} reactions from "
+                                 f"{cached.id}")
+                return await cached.edit(**fields)
             except discord.NotFound:
-                del self.bot._edit_cache[self.message.id]
-        else:
-            message = await super().send(*args, **kwargs)
-            self.bot._edit_cache[self.message.id] = message
+                edit_cache.remove(self.message.id)
+        message, sent = await self._deliver(*args, **kwargs)
+
+        # a reply merged into another's message is owned by that one,
+        # which would otherwise edit over this invocation's reply
+        if sent:
+            edit_cache.put(self.message.id, message)
         return message
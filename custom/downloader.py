@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import os
+import time
+from os.path import basename
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import aiofiles
+import aiohttp
+
+from base.utils import format_size
+
+
+class DownloadResult(object):
+    __slots__ = ("url", "path", "size", "elapsed", "resumed", "error")
+
+    def __init__(self, url: str, path: str):
+        self.url = url
+        self.path = path
+        self.size = 0
+        self.elapsed = 0.0
+        self.resumed = False
+        self.error: Exception = None
+
+    def __repr__(self):
+        return (f"<DownloadResult path={self.path!r} size={self.size} "
+                f"elapsed={self.elapsed:.2f} error={self.error!r}>")
+
+    def __str__(self):
+        name = basename(self.path)
+
+        if self.error:
+            return f"[x] {name}: {type(self.error).__name__}"
+        resumed = " (resumed)" if self.resumed else ""
+        return (f"[ ] {name}: {format_size(self.size)} at "
+                f"{format_size(self.throughput)}/s{resumed}")
+
+    @property
+    def throughput(self):
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+class Downloader(object):
+    MINIMUM_CHUNK = 64 * 1024
+    MAXIMUM_CHUNK = 4 * 1024 * 1024
+
+    def __init__(self, directory: str = "downloads", *,
+                 concurrency: int = 4,
+                 flush_time: float = 0.05):
+        self.directory = directory
+        self.concurrency = concurrency
+        # chunks grow while writing them takes less time than this
+        self.flush_time = flush_time
+
+        self._running: Dict[str, asyncio.Future] = {}
+
+    def _get_path(self, url: str):
+        parsed = urlparse(url)
+        filename = basename(parsed.path) or parsed.netloc
+        return os.path.join(self.directory, filename)
+
+    @staticmethod
+    def _get_partial(url: str, path: str):
+        # keyed by the whole url, so files sharing a name never append
+        # into the same partial file
+        digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+        return f"{path}.{digest}.part"
+
+    @staticmethod
+    def _partial_size(partial: str):
+        try:
+            return os.path.getsize(partial)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _complete_length(response: aiohttp.ClientResponse) -> Optional[int]:
+        # an unsatisfiable range is answered with "bytes */<length>"
+        content_range = response.headers.get("Content-Range", "")
+        _, _, length = content_range.rpartition("/")
+        return int(length) if length.isdigit() else None
+
+    @staticmethod
+    async def _run(function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, function, *args)
+
+    async def _stream(self, response: aiohttp.ClientResponse, f,
+                      result: DownloadResult):
+        chunk_size = self.MINIMUM_CHUNK
+        buffer = bytearray()
+
+        async for data in response.content.iter_any():
+            buffer += data
+
+            if len(buffer) >= chunk_size:
+                started = time.perf_counter()
+                await f.write(buffer)
+                result.size += len(buffer)
+                buffer.clear()
+
+                if time.perf_counter() - started < self.flush_time:
+                    chunk_size = min(chunk_size * 2, self.MAXIMUM_CHUNK)
+
+        if buffer:
+            await f.write(buffer)
+            result.size += len(buffer)
+
+    async def _fetch(self, session: aiohttp.ClientSession, partial: str,
+                     result: DownloadResult):
+        offset = await self._run(self._partial_size, partial)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with session.get(result.url, headers=headers) as response:
+            if response.status == 416:
+                # only complete if the partial file holds the whole body
+                if self._complete_length(response) == offset:
+                    result.size = offset
+                    result.resumed = True
+                    return True
+                await self._run(os.remove, partial)
+                return False
+            response.raise_for_status()
+            result.resumed = response.status == 206
+            mode = "ab" if result.resumed else "wb"
+
+            async with aiofiles.open(partial, mode) as f:
+                await self._stream(response, f, result)
+        return True
+
+    async def _download(self,
+                        session: aiohttp.ClientSession,
+                        url: str) -> DownloadResult:
+        path = self._get_path(url)
+        partial = self._get_partial(url, path)
+        result = DownloadResult(url, path)
+        started = time.perf_counter()
+
+        try:
+            # a partial file not matching the body is restarted once
+            if not await self._fetch(session, partial, result):
+                await self._fetch(session, partial, result)
+            await self._run(os.replace, partial, path)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as error:
+            # the partial file is kept so the transfer can be resumed
+            result.error = error
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def download(self,
+                       session: aiohttp.ClientSession,
+                       url: str) -> DownloadResult:
+        running = self._running.get(url, None)
+
+        # the same url requested again while in flight is not refetched
+        if running is None:
+            running = asyncio.ensure_future(self._download(session, url))
+            self._running[url] = running
+            running.add_done_callback(lambda _: self._running.pop(url))
+        return await asyncio.shield(running)
+
+    async def download_many(self,
+                            session: aiohttp.ClientSession,
+                            urls: Iterable[str]) -> List[DownloadResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(url):
+            async with semaphore:
+                return await self.download(session, url)
+        return await asyncio.gather(*map(bounded, urls))
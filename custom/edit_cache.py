@@ -0,0 +1,101 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import discord
+
+
+class EditCacheEntry(object):
+    __slots__ = ("channel_id", "message_id", "expires")
+
+    def __init__(self, channel_id: int, message_id: int, expires: float):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.expires = expires
+
+    def __repr__(self):
+        return (f"<EditCacheEntry channel_id={self.channel_id} "
+                f"message_id={self.message_id}>")
+
+    @classmethod
+    def size(cls):
+        entry = cls(2 ** 62, 2 ** 62, 0.0)
+        attributes = sum(sys.getsizeof(getattr(entry, attr))
+                         for attr in cls.__slots__)
+        # the id key and its linked slot within the ordered dict
+        overhead = sys.getsizeof(2 ** 62) + 104
+
+        return sys.getsizeof(entry) + attributes + overhead
+
+
+class EditCache(object):
+    def __init__(self, maximum: int = 1000, *,
+                 ttl: float = None,
+                 max_bytes: int = None):
+        if max_bytes is not None:
+            maximum = min(maximum, max_bytes // EditCacheEntry.size())
+        self.maximum = maximum
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: Dict[int, EditCacheEntry] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, message_id: int):
+        return message_id in self._entries
+
+    def __repr__(self):
+        return (f"<EditCache size={len(self)} maximum={self.maximum} "
+                f"hits={self.hits} misses={self.misses} "
+                f"evictions={self.evictions}>")
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self),
+            "maximum": self.maximum,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def get(self, message_id: int) -> Optional[EditCacheEntry]:
+        entry = self._entries.get(message_id, None)
+
+        if entry is not None and self.ttl is not None:
+            if entry.expires <= time.monotonic():
+                del self._entries[message_id]
+                self.evictions += 1
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(message_id)
+        return entry
+
+    def put(self, message_id: int, message: discord.abc.Snowflake):
+        expires = 0.0
+
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        self._entries[message_id] = EditCacheEntry(message.channel.id,
+                                                   message.id,
+                                                   expires)
+        self._entries.move_to_end(message_id)
+
+        while len(self._entries) > self.maximum:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def remove(self, message_id: int):
+        return self._entries.pop(message_id, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -1,26 +1,87 @@
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
+from typing import Iterator, List, Union
 
 import discord
 
+TOTAL_LIMIT = 6000
+FIELD_LIMIT = 25
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 2048
+NAME_LIMIT = 256
+VALUE_LIMIT = 1024
+ELLIPSIS = "…"
+
+
+def truncate(text: str, limit: int):
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1] + ELLIPSIS
+
+
+def split_text(text: str, limit: int) -> Iterator[str]:
+    # lines are kept whole wherever they fit
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+
+        if cut <= 0:
+            cut = limit
+        yield text[:cut]
+        text = text[cut:].lstrip("\n")
+    yield text
+
 
 class Field(object):
+    __slots__ = ("name", "value", "inline")
+
+    KEYS = ("name", "value", "inline")
+
     def __init__(self, name: str = "\u200b",
                  value: str = "\u200b", inline: bool = False):
-        self._dict = dict(name=name, value=value, inline=inline)
         self.name = name
         self.value = value
         self.inline = inline
 
-        self.keys = self._dict.keys
+    # keys and __getitem__ let a field unpack like the dict it replaces
+    def keys(self):
+        return self.KEYS
 
     def __getitem__(self, key):
-        return self._dict[key]
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
 
     def __repr__(self):
         return (f"<Field name={repr(self.name)} "
                 f"value={repr(self.value)} "
                 f"inline={repr(self.inline)}>")
 
+    @property
+    def size(self):
+        return len(str(self.name)) + len(str(self.value))
+
+    def to_dict(self):
+        return {
+            "name": truncate(str(self.name), NAME_LIMIT),
+            "value": truncate(str(self.value), VALUE_LIMIT),
+            "inline": self.inline
+        }
+
+
+class Page(object):
+    __slots__ = ("payload",)
+
+    # sending only ever calls to_dict, so a payload needs no Embed
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def to_dict(self):
+        return self.payload
+
 
 class Embed(discord.Embed):
     def __init__(self, *args, **kwargs):
@@ -29,15 +90,134 @@ class Embed(discord.Embed):
 
         super().__init__(*args, **kwargs)
         self.description = kwargs.pop("desc", self.description)
+        self._fields: List[Field] = []
+        self._length = 0
+
+        if isinstance(fields, (Field, Mapping)):
+            fields = (fields,)
+        self.add_fields(fields)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        self = super().from_dict(data)
+        fields = getattr(self, "_fields", [])
         self._fields = []
+        self._length = 0
+        return self.add_fields(fields)
+
+    @staticmethod
+    def _as_field(field: Union[Field, Mapping]):
+        if isinstance(field, Field):
+            return field
+        return Field(field["name"], field["value"],
+                     field.get("inline", False))
+
+    def _header_size(self):
+        size = len(self.title or "") + len(self.description or "")
+
+        for proxy in (self.footer.text, self.author.name):
+            if proxy is not discord.Embed.Empty:
+                size += len(proxy)
+        return size
 
-        if isinstance(fields, Field):
-            self._fields.append({**fields})
-        else:
-            for field in fields:
-                self._fields.append({**field})
+    @property
+    def paginated(self):
+        return (len(self._fields) > FIELD_LIMIT or
+                len(self.description or "") > DESCRIPTION_LIMIT or
+                self._header_size() + self._length > TOTAL_LIMIT)
+
+    def add_field(self, *, name, value, inline=True):
+        return self.add_fields((Field(name, value, inline),))
 
     def add_fields(self, fields: Iterable):
         for field in fields:
-            self._fields.append({**fields})
+            field = self._as_field(field)
+            self._length += field.size
+
+            self._fields.append(field)
+        return self
+
+    def insert_field_at(self, index, *, name, value, inline=True):
+        field = Field(name, value, inline)
+        self._length += field.size
+
+        self._fields.insert(index, field)
         return self
+
+    def set_field_at(self, index, *, name, value, inline=True):
+        field = self._fields[index]
+        self._length -= field.size
+        field.name, field.value, field.inline = name, value, inline
+        self._length += field.size
+        return self
+
+    def remove_field(self, index):
+        try:
+            self._length -= self._fields.pop(index).size
+        except IndexError:
+            pass
+
+    def clear_fields(self):
+        self._fields.clear()
+        self._length = 0
+
+    def _get_header(self):
+        header = super().to_dict()
+        header.pop("fields", None)
+        header.pop("description", None)
+
+        if "title" in header:
+            header["title"] = truncate(header["title"], TITLE_LIMIT)
+        return header
+
+    def pages(self) -> Iterator[dict]:
+        # every page repeats the header, fields fill the budget left
+        header = self._get_header()
+        base = self._header_size() - len(self.description or "")
+        page, size, fields = dict(header), base, []
+
+        if self.description:
+            for chunk in split_text(self.description, DESCRIPTION_LIMIT):
+                if "description" in page:
+                    yield page
+                    page, size = dict(header), base
+                page["description"] = chunk
+                size += len(chunk)
+
+        for field in self._fields:
+            payload = field.to_dict()
+            cost = len(payload["name"]) + len(payload["value"])
+
+            if len(fields) == FIELD_LIMIT or size + cost > TOTAL_LIMIT:
+                page["fields"] = fields
+                yield page
+                page, size, fields = dict(header), base, []
+            fields.append(payload)
+            size += cost
+
+        if fields:
+            page["fields"] = fields
+        yield page
+
+    def copy(self):
+        # to_dict holds a single page, so fields are copied directly
+        data = super().to_dict()
+        data["fields"] = [Field(f.name, f.value, f.inline)
+                          for f in self._fields]
+        return self.from_dict(data)
+
+    def to_dict(self):
+        # sending one embed that needs several messages would silently
+        # drop every page but the first
+        if self.paginated:
+            raise ValueError("Embed exceeds the limits of a single "
+                             "message, send it with Embed.send instead")
+        return next(self.pages())
+
+    async def send(self, destination: discord.abc.Messageable, **kwargs):
+        messages = []
+
+        for payload in self.pages():
+            message = await destination.send(embed=Page(payload), **kwargs)
+            messages.append(message)
+        return messages
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import traceback
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import discord
+
+from .embed import Embed, Page
+from base.typings import Destination
+from base.utils import as_file
+
+Fingerprint = int
+# a formatter may hand back the full text, to be attached as a file
+Formatted = Union[str, Tuple[str, Optional[str]]]
+ATTACHMENT_LIMIT = 10
+
+
+class ErrorReport(object):
+    __slots__ = ("formatted", "attachment", "count")
+
+    def __init__(self, formatted: str, attachment: Optional[str] = None):
+        self.formatted = formatted
+        self.attachment = attachment
+        self.count = 0
+
+    def __str__(self):
+        if self.count > 1:
+            return f"**×{self.count}**\n{self.formatted}"
+        return self.formatted
+
+
+class ErrorReporter(object):
+    def __init__(self, format_exception: Callable[[Exception], Formatted], *,
+                 fingerprint: Callable[[Exception], Fingerprint] = None,
+                 window: float = 10.0,
+                 budget: int = 5,
+                 limit: int = 2048,
+                 maximum: int = 256):
+        self.format_exception = format_exception
+        self.get_fingerprint = fingerprint or self.fingerprint
+        self.window = window
+        # messages each destination may receive per window
+        self.budget = budget
+        self.limit = limit
+        self.maximum = maximum
+        self.reported = 0
+        self.sent = 0
+
+        self._formatted: Dict[Fingerprint, Tuple[str, Optional[str]]] = \
+            OrderedDict()
+        self._pending: Dict[int, Tuple[discord.abc.Messageable,
+                                       Dict[Fingerprint, ErrorReport]]] = {}
+        self._flusher: asyncio.Task = None
+
+    @staticmethod
+    def fingerprint(error: Exception) -> Fingerprint:
+        # code objects and line numbers are enough to tell tracebacks
+        # apart, without reading any source like extract_tb does
+        frames = tuple((frame.f_code, lineno) for frame, lineno
+                       in traceback.walk_tb(error.__traceback__))
+        cls = type(error)
+        return hash((cls.__module__, cls.__qualname__, frames))
+
+    def _format(self, fingerprint: Fingerprint, error: Exception):
+        formatted = self._formatted.get(fingerprint, None)
+
+        if formatted is None:
+            formatted = self.format_exception(error)
+
+            if isinstance(formatted, str):
+                formatted = (formatted, None)
+
+            if len(self._formatted) >= self.maximum:
+                self._formatted.popitem(last=False)
+            self._formatted[fingerprint] = formatted
+        return formatted
+
+    def _take_batch(self, reports: Dict[Fingerprint, ErrorReport]):
+        batch: List[Tuple[Fingerprint, str]] = []
+        attachments: List[str] = []
+        length = 0
+
+        for fingerprint, report in reports.items():
+            rendered = str(report)
+            length += len(rendered) + 1
+            crowded = (report.attachment and
+                       len(attachments) >= ATTACHMENT_LIMIT)
+
+            # an oversized report is still sent, only ever on its own
+            if batch and (length > self.limit or crowded):
+                break
+            batch.append((fingerprint, rendered))
+
+            if report.attachment:
+                attachments.append(report.attachment)
+
+        for fingerprint, _ in batch:
+            del reports[fingerprint]
+        return ("\n").join(rendered for _, rendered in batch), attachments
+
+    async def _send(self, destination: discord.abc.Messageable,
+                    reports: Dict[Fingerprint, ErrorReport]):
+        remaining = self.budget
+
+        # the budget counts messages, however many pages a batch needs
+        while reports and remaining > 0:
+            description, attachments = self._take_batch(reports)
+            pages = list(Embed(description=description).pages())
+            pages = pages[:remaining]
+            remaining -= len(pages)
+
+            # an oversized report continues over further pages, and
+            # full tracebacks come along with the last of them
+            for index, payload in enumerate(pages, start=1):
+                files = None
+
+                if index == len(pages) and attachments:
+                    files = [as_file(text, f"traceback-{number}.txt")
+                             for number, text
+                             in enumerate(attachments, start=1)]
+                self.sent += 1
+
+                with contextlib.suppress(discord.HTTPException):
+                    await destination.send(embed=Page(payload), files=files)
+
+    async def _flush_periodically(self):
+        # the first report goes out at once, later ones are coalesced
+        # for as long as they keep arriving within the window
+        while self._pending:
+            await self.flush()
+            await asyncio.sleep(self.window)
+
+    def report(self, error: Exception, destination: Destination):
+        channel = getattr(destination, "channel", destination)
+        fingerprint = self.get_fingerprint(error)
+        _, reports = self._pending.setdefault(channel.id, (channel, {}))
+        report = reports.get(fingerprint, None)
+        self.reported += 1
+
+        if report is None:
+            formatted, attachment = self._format(fingerprint, error)
+            report = reports[fingerprint] = ErrorReport(formatted,
+                                                        attachment)
+        report.count += 1
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def flush(self):
+        pending = list(self._pending.items())
+
+        for channel_id, (destination, reports) in pending:
+            await self._send(destination, reports)
+
+            # reports over budget carry over, still being counted
+            if not reports:
+                self._pending.pop(channel_id, None)
+
+    def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+        self._pending.clear()
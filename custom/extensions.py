@@ -0,0 +1,91 @@
+import ast
+import asyncio
+import contextlib
+import importlib
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+from discord.ext import commands
+
+COMMAND_DECORATORS = ("command", "group")
+
+
+class LazyExtension(object):
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+        self.commands: List[Tuple[str, List[str]]] = []
+        self.imports: List[str] = []
+        self.stubs: List[commands.Command] = []
+
+        self._discover()
+
+    def __repr__(self):
+        return f"<LazyExtension name={self.name!r} commands={self.commands}>"
+
+    def _get_command(self, node: ast.AST, decorator: ast.AST):
+        # only top-level commands matter, subcommands are registered by
+        # their parent; so just @commands.command and @commands.group
+        if not isinstance(decorator, ast.Call):
+            return None
+        func = decorator.func
+
+        if not (isinstance(func, ast.Attribute) and
+                func.attr in COMMAND_DECORATORS and
+                isinstance(func.value, ast.Name) and
+                func.value.id == "commands"):
+            return None
+        options = {keyword.arg: keyword.value
+                   for keyword in decorator.keywords}
+        name = node.name
+        aliases = []
+
+        with contextlib.suppress(ValueError, KeyError):
+            name = ast.literal_eval(options["name"])
+
+        with contextlib.suppress(ValueError, KeyError):
+            aliases = list(ast.literal_eval(options["aliases"]))
+        return name, aliases
+
+    def _discover(self):
+        tree = ast.parse(self.path.read_text(), filename=str(self.path))
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                self.imports.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                self.imports.append(node.module)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    command_found = self._get_command(node, decorator)
+
+                    if command_found:
+                        self.commands.append(command_found)
+
+    def _import_dependencies(self):
+        for module in self.imports:
+            with contextlib.suppress(ImportError):
+                importlib.import_module(module)
+
+    def create_stubs(self, invoke: Callable[..., Awaitable]):
+        def create_stub():
+            async def stub(ctx):
+                await invoke(ctx, self)
+            return stub
+
+        self.stubs = [
+            commands.Command(create_stub(), name=name, aliases=aliases,
+                             hidden=True)
+            for name, aliases in self.commands
+        ]
+
+        for stub in self.stubs:
+            stub.lazy_extension = self
+        return self.stubs
+
+    async def prepare(self):
+        # importing dependencies in threads lets independent extensions
+        # warm sys.modules concurrently, leaving only the extension
+        # itself to be executed on the loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._import_dependencies)
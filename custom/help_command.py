@@ -1,11 +1,45 @@
+import weakref
+from collections import OrderedDict
 from collections.abc import Iterable
+from typing import Callable, Dict, Hashable, List
 
 from discord.ext import commands
 
-from .embed import Embed, Field
+from .embed import Embed, Field, Page
 from base.typings import Command
 
 
+class HelpCache(object):
+    def __init__(self, maximum: int = 512):
+        self.version: int = None
+        self.maximum = maximum
+        self.pages: Dict[Hashable, List[dict]] = OrderedDict()
+
+    def get(self, bot, key: Hashable):
+        # any command or cog change bumps the version, discarding every
+        # page rendered beforehand
+        if self.version != bot.commands_version:
+            self.version = bot.commands_version
+            self.pages.clear()
+        pages = self.pages.get(key, None)
+
+        if pages is not None:
+            self.pages.move_to_end(key)
+        return pages
+
+    def set(self, key: Hashable, pages: List[dict]):
+        self.pages[key] = pages
+
+        # per guild prefixes would otherwise grow the cache unbounded
+        if len(self.pages) > self.maximum:
+            self.pages.popitem(last=False)
+        return pages
+
+
+# help commands are copied per invocation, so caches live per bot
+_caches: Dict[commands.Bot, HelpCache] = weakref.WeakKeyDictionary()
+
+
 class HelpCommand(commands.HelpCommand):
     DEFAULT_HELP = "\U0000203c `No help message provided.`"
 
@@ -37,16 +71,46 @@ class HelpCommand(commands.HelpCommand):
         return self._format(", ", command.aliases)
 
     def _sort_mapping(self, mapping):
-        mapping.setdefault("Uncategorised", mapping[None])
-        del mapping[None]
+        mapping = {
+            cog or "Uncategorised": cog_commands
+            for cog, cog_commands in mapping.items()
+        }
         return sorted(mapping.items(), key=self.key)
 
+    def _is_owner(self):
+        owners = self.context.bot.owners
+        return owners.is_owner_id(self.context.author.id) is True
+
+    def _get_cache(self):
+        bot = self.context.bot
+        cache = _caches.get(bot, None)
+
+        if cache is None:
+            cache = _caches[bot] = HelpCache()
+        return cache
+
+    async def _send_cached(self, dest, target: str,
+                           render: Callable[[], Embed]):
+        cache = self._get_cache()
+        # rendered pages show clean_prefix, which for mentions holds
+        # the bot's nickname in that guild
+        key = (target, self._is_owner(), self.clean_prefix)
+        pages = cache.get(self.context.bot, key)
+
+        # help for large bots overflows into further pages, rather than
+        # being rejected for exceeding the embed limits
+        if pages is None:
+            pages = cache.set(key, list(render().pages()))
+
+        for payload in pages:
+            await dest.send(embed=Page(payload))
+
     def key(self, data):
         cog = data[0]
         return getattr(cog, "qualified_name", cog)
 
     def filter(self, command):
-        is_owner = self.context.author.id == self.context.bot.owner_id
+        is_owner = self._is_owner()
 
         return (is_owner is False and command.hidden is False) or is_owner
 
@@ -58,61 +122,86 @@ class HelpCommand(commands.HelpCommand):
             append = f" {command.signature}"
         return f"`{self.clean_prefix}{command.name}{append}`"
 
-    @pass_dest
-    async def send_command_help(self, dest, command):
+    def render_command_help(self, command):
         fields = []
         aliases = self._get_aliases(command)
 
         if aliases != "":
             fields.append(Field("Aliases", aliases))
         fields.append(Field("Usage", self.get_command_signature(command)))
-        embed = Embed(title=self._capitalise(command.name),
-                      desc=self._get_help(command),
-                      fields=fields)
-        await dest.send(embed=embed)
+        return Embed(title=self._capitalise(command.name),
+                     desc=self._get_help(command),
+                     fields=fields)
 
-    @pass_dest
-    async def send_group_help(self, dest, group):
+    def render_group_help(self, group):
         fields = []
         aliases = self._get_aliases(group)
-        subcommands = self._format(", ", (c.name for c in group.commands))
+        subcommands = self._format(", ", (c.name for c in group.commands
+                                          if self.filter(c)))
 
         if aliases != "":
             fields.append(Field("Aliases", aliases))
         fields.extend((Field("Subcommands", subcommands),
                        Field("Usage", self.get_command_signature(group))))
-        embed = Embed(title=self._capitalise(group.name),
-                      desc=self._get_help(group),
-                      fields=fields)
-        await dest.send(embed=embed)
+        return Embed(title=self._capitalise(group.name),
+                     desc=self._get_help(group),
+                     fields=fields)
 
-    @pass_dest
-    async def send_cog_help(self, dest, cog):
+    def render_cog_help(self, cog):
         desc = cog.description
-        cog_commands = self._format(", ", (c.name for c in cog.get_commands()))
+        cog_commands = self._format(", ", (c.name for c in cog.get_commands()
+                                           if self.filter(c)))
         fields = Field("Commands", cog_commands)
 
         if desc is None:
             desc = self.DEFAULT_HELP
-        embed = Embed(title=self._capitalise(cog.qualified_name),
-                      desc=desc,
-                      fields=fields)
-        await dest.send(embed=embed)
+        return Embed(title=self._capitalise(cog.qualified_name),
+                     desc=desc,
+                     fields=fields)
 
-    @pass_dest
-    async def send_bot_help(self, dest, mapping):
+    def render_bot_help(self, mapping):
         mapping = self._sort_mapping(mapping)
         desc = f"For additional support, do `{self.clean_prefix}invite`"
         fields = []
 
         for cog, cog_commands in mapping:
+            cog_commands = [c for c in cog_commands if self.filter(c)]
+
             if cog_commands != []:
-                category = self._capitalise(cog.qualified_name)
+                category = self._capitalise(self.key((cog,)))
                 category_commands = self._format(
                     ", ",
                     map(self._capitalise, (c.name for c in cog_commands))
                 )
 
                 fields.append(Field(category, category_commands))
-        embed = Embed(title="Help", desc=desc, fields=fields)
-        await dest.send(embed=embed)
+        return Embed(title="Help", desc=desc, fields=fields)
+
+    @pass_dest
+    async def send_command_help(self, dest, command):
+        await self._send_cached(
+            dest,
+            f"command:{command.qualified_name}",
+            lambda: self.render_command_help(command)
+        )
+
+    @pass_dest
+    async def send_group_help(self, dest, group):
+        await self._send_cached(
+            dest,
+            f"command:{group.qualified_name}",
+            lambda: self.render_group_help(group)
+        )
+
+    @pass_dest
+    async def send_cog_help(self, dest, cog):
+        await self._send_cached(
+            dest,
+            f"cog:{cog.qualified_name}",
+            lambda: self.render_cog_help(cog)
+        )
+
+    @pass_dest
+    async def send_bot_help(self, dest, mapping):
+        await self._send_cached(dest, "bot",
+                                lambda: self.render_bot_help(mapping))
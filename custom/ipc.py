@@ -0,0 +1,216 @@
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import sys
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+Handler = Callable[[dict], Awaitable[Any]]
+# metrics from a busy cluster easily outgrow the default of 64KiB
+LINE_LIMIT = 2 ** 24
+
+
+def encode(message: dict):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class IPCServer(object):
+    def __init__(self, path: str = "cluster.sock"):
+        self.path = path
+
+        self._clients: Dict[int, asyncio.StreamWriter] = {}
+        self._server: asyncio.AbstractServer = None
+
+    def _get_recipients(self, message: dict):
+        target = message.get("to", None)
+
+        if target is not None:
+            found = self._clients.get(target, None)
+            return [found] if found else []
+        return [writer for cluster_id, writer in self._clients.items()
+                if cluster_id != message.get("from", None)]
+
+    async def _relay(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        cluster_id = None
+
+        try:
+            while True:
+                line = b""
+
+                with contextlib.suppress(ConnectionError):
+                    line = await reader.readline()
+
+                # a cluster which died without closing just disconnects
+                if not line:
+                    break
+                message = json.loads(line)
+
+                if message["op"] == "identify":
+                    cluster_id = message["from"]
+                    self._clients[cluster_id] = writer
+                    continue
+                recipients = self._get_recipients(message)
+
+                for recipient in recipients:
+                    recipient.write(line)
+                await asyncio.gather(*(r.drain() for r in recipients),
+                                     return_exceptions=True)
+        except asyncio.CancelledError:
+            # closing the server cancels every connection still open
+            pass
+        finally:
+            if self._clients.get(cluster_id, None) is writer:
+                del self._clients[cluster_id]
+            writer.close()
+
+    async def start(self):
+        # a socket left behind by a crashed launcher refuses to bind
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._relay,
+                                                       path=self.path,
+                                                       limit=LINE_LIMIT)
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+        for writer in self._clients.values():
+            writer.close()
+        self._clients.clear()
+
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+class IPCClient(object):
+    def __init__(self, path: str, cluster_id: int, *,
+                 clusters: int = 1,
+                 timeout: float = 5.0):
+        self.path = path
+        self.cluster_id = cluster_id
+        self.clusters = clusters
+        self.timeout = timeout
+        self.handlers: Dict[str, Handler] = {}
+
+        self._reader: asyncio.StreamReader = None
+        self._writer: asyncio.StreamWriter = None
+        self._listener: asyncio.Task = None
+        self._nonces = itertools.count()
+        self._replies: Dict[int, Tuple[List[dict], asyncio.Future]] = {}
+
+    def add_handler(self, op: str, handler: Handler):
+        self.handlers[op] = handler
+
+    def remove_handler(self, op: str):
+        self.handlers.pop(op, None)
+
+    async def _send(self, message: dict):
+        if self._writer is None:
+            raise RuntimeError("IPCClient has to connect before sending")
+        message["from"] = self.cluster_id
+        self._writer.write(encode(message))
+        await self._writer.drain()
+
+    def _receive_reply(self, message: dict):
+        found = self._replies.get(message["nonce"], None)
+
+        if found is None:
+            return
+        replies, future = found
+        replies.append(message)
+
+        if len(replies) >= self.clusters - 1 and not future.done():
+            future.set_result(replies)
+
+    async def _handle(self, message: dict):
+        handler = self.handlers.get(message["op"], None)
+
+        if handler is None:
+            return
+        reply = {"op": "reply", "data": None}
+
+        try:
+            reply["data"] = await handler(message["data"])
+        except Exception as error:
+            print(f"Ignoring exception in IPC handler {message['op']}:",
+                  file=sys.stderr)
+            traceback.print_exc()
+            reply["error"] = f"{type(error).__name__}: {error}"
+
+        # requests are answered even when handling failed, so the
+        # requester is not left waiting for its timeout
+        if message.get("nonce", None) is not None:
+            await self._send({**reply,
+                              "to": message["from"],
+                              "nonce": message["nonce"]})
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            line = await self._reader.readline()
+
+            if not line:
+                break
+            message = json.loads(line)
+
+            if message["op"] == "reply":
+                self._receive_reply(message)
+            else:
+                # handlers such as close must not hold up the listener
+                loop.create_task(self._handle(message))
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(
+            self.path,
+            limit=LINE_LIMIT
+        )
+
+        await self._send({"op": "identify"})
+        self._listener = asyncio.get_running_loop().create_task(
+            self._listen()
+        )
+
+    async def broadcast(self, op: str, **data):
+        await self._send({"op": op, "data": data})
+
+    async def request(self, op: str, **data) -> List[Any]:
+        if self.clusters <= 1:
+            return []
+        nonce = next(self._nonces)
+        future = asyncio.get_running_loop().create_future()
+        replies: List[dict] = []
+        self._replies[nonce] = (replies, future)
+
+        try:
+            await self._send({"op": op, "nonce": nonce, "data": data})
+            await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._replies[nonce]
+        results = []
+
+        # clusters that failed, or did not answer in time, are left out
+        for reply in replies:
+            if "error" in reply:
+                print(f"[!] Cluster {reply['from']} failed {op}: "
+                      f"{reply['error']}", file=sys.stderr)
+            else:
+                results.append(reply["data"])
+        return results
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+
+        if self._writer:
+            self._writer.close()
+
+            with contextlib.suppress(ConnectionError):
+                await self._writer.wait_closed()
@@ -0,0 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def create_loop(*, use_uvloop: bool = True,
+                executor_workers: int = None,
+                slow_callback_duration: float = None):
+    if use_uvloop and uvloop is not None:
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    if executor_workers:
+        executor = ThreadPoolExecutor(max_workers=executor_workers)
+        loop.set_default_executor(executor)
+
+    # slow callbacks are only ever logged in debug mode
+    if slow_callback_duration is not None:
+        loop.set_debug(True)
+        loop.slow_callback_duration = slow_callback_duration
+    return loop
+
+
+def describe_loop(loop: asyncio.AbstractEventLoop):
+    cls = type(loop)
+    return f"{cls.__module__}.{cls.__qualname__}"
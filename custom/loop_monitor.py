@@ -0,0 +1,124 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+STACK_LIMIT = 8
+
+
+class LoopStall(object):
+    __slots__ = ("duration", "task", "stack", "fingerprint")
+
+    def __init__(self, duration: float, task: Optional[str] = None,
+                 stack: str = "", fingerprint: int = 0):
+        self.duration = duration
+        self.task = task
+        self.stack = stack
+        self.fingerprint = fingerprint
+
+    def __str__(self):
+        location = f" in {self.task}" if self.task else ""
+        return (f"Event loop blocked for {self.duration * 1000:.0f}ms"
+                f"{location}")
+
+
+class LoopMonitor(object):
+    def __init__(self, loop: asyncio.AbstractEventLoop, *,
+                 interval: float = 0.05,
+                 threshold: float = 0.25,
+                 window: int = 1200,
+                 callback: Callable[[LoopStall], None] = None):
+        self.loop = loop
+        self.interval = interval
+        # lag beyond this is reported as a stall
+        self.threshold = threshold
+        self.callback = callback
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.stalls = 0
+
+        self._beat: float = None
+        self._captured: Tuple[float, LoopStall] = None
+        self._thread_id: int = None
+        self._stopped = threading.Event()
+
+    def percentile(self, q: float):
+        if not self.lags:
+            return 0.0
+        lags = sorted(self.lags)
+        return lags[min(int(q * len(lags)), len(lags) - 1)]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": max(self.lags, default=0.0),
+            "stalls": self.stalls
+        }
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._thread_id, None)
+
+        if frame is None:
+            return None
+        task = asyncio.current_task(self.loop)
+        summary = traceback.extract_stack(frame, limit=STACK_LIMIT)
+        fingerprint = hash(tuple((entry.filename, entry.lineno)
+                                 for entry in summary))
+        del frame
+        return LoopStall(0.0,
+                         task=task.get_coro().__qualname__ if task else None,
+                         stack=("").join(summary.format()),
+                         fingerprint=fingerprint)
+
+    def _watch(self):
+        # the loop thread cannot report on itself while it is blocked,
+        # so its stack is captured from here mid-stall
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+
+            if (beat is None or
+                    time.monotonic() - beat < self.threshold or
+                    (self._captured and self._captured[0] == beat)):
+                continue
+            stall = self._capture()
+
+            if stall:
+                self._captured = (beat, stall)
+
+    def _report(self, beat: float, lag: float):
+        captured = self._captured
+        self._captured = None
+        stall = LoopStall(lag)
+
+        # a capture is only trusted for the stall it was taken during
+        if captured and captured[0] == beat:
+            stall = captured[1]
+            stall.duration = lag
+        self.stalls += 1
+
+        if self.callback:
+            self.callback(stall)
+
+    async def run(self):
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-monitor",
+                                    daemon=True)
+        watchdog.start()
+
+        try:
+            while True:
+                self._beat = beat = time.monotonic()
+                expected = self.loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(self.loop.time() - expected, 0.0)
+
+                self.lags.append(lag)
+
+                if lag >= self.threshold:
+                    self._report(beat, lag)
+        finally:
+            self._stopped.set()
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+LATENCY_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                  0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(object):
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BOUNDS):
+        self.bounds: Tuple[float] = tuple(bounds)
+        # the final bucket holds everything above the last bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def __repr__(self):
+        return f"<Histogram count={self.count} mean={self.mean:.4f}>"
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            seen += count
+
+            if seen >= target:
+                if index < len(self.bounds):
+                    return self.bounds[index]
+                break
+        return float("inf")
+
+    def to_dict(self):
+        return {"counts": self.counts, "total": self.total}
+
+    def merge(self, data: dict):
+        for index, count in enumerate(data["counts"]):
+            self.counts[index] += count
+        self.count += sum(data["counts"])
+        self.total += data["total"]
+
+    def cumulative(self):
+        seen = 0
+
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            seen += count
+            yield bound, seen
+
+
+STAGES = ("prefix", "context", "checks", "callback", "send")
+
+
+def _escape(value: str):
+    return (value.replace("\\", "\\\\")
+                 .replace('"', '\\"')
+                 .replace("\n", "\\n"))
+
+
+class CommandTimer(object):
+    __slots__ = ("received", "prefix", "context", "checks", "callback",
+                 "send")
+
+    def __init__(self):
+        self.received = time.perf_counter()
+        self.prefix = self.context = self.checks = self.callback = None
+        # time spent sending is accumulated, rather than marked
+        self.send = 0.0
+
+    def mark(self, stage: str):
+        setattr(self, stage, time.perf_counter())
+
+    def durations(self, completed: float) -> Iterator[Tuple[str, float]]:
+        previous = self.received
+
+        # stages never reached, such as the callback after a failed
+        # check, last until the command completed
+        for stage in STAGES[:-1]:
+            marked = getattr(self, stage)
+            marked = completed if marked is None else marked
+            duration = max(marked - previous, 0.0)
+
+            if stage == "callback":
+                duration = max(duration - self.send, 0.0)
+            previous = marked
+
+            yield stage, duration
+        yield "send", self.send
+
+
+class CommandStats(object):
+    __slots__ = ("count", "errors", "latency", "stages")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BOUNDS):
+        self.count = 0
+        self.errors = 0
+        self.latency = Histogram(bounds)
+        self.stages = {stage: Histogram(bounds) for stage in STAGES}
+
+    @property
+    def error_rate(self):
+        return self.errors / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "latency": self.latency.to_dict(),
+            "stages": {stage: histogram.to_dict()
+                       for stage, histogram in self.stages.items()}
+        }
+
+    def merge(self, data: dict):
+        self.count += data["count"]
+        self.errors += data["errors"]
+        self.latency.merge(data["latency"])
+
+        for stage, histogram in data["stages"].items():
+            self.stages[stage].merge(histogram)
+
+    def observe(self, timer: CommandTimer, completed: float, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.latency.observe(completed - timer.received)
+
+        for stage, duration in timer.durations(completed):
+            self.stages[stage].observe(duration)
+
+
+class CommandMetrics(object):
+    def __init__(self, bounds: Sequence[float] = LATENCY_BOUNDS, *,
+                 namespace: str = "bot"):
+        self.bounds = tuple(bounds)
+        self.namespace = namespace
+        self.commands: Dict[str, CommandStats] = {}
+        self.cogs: Dict[str, CommandStats] = {}
+
+    def _get_stats(self, stats: Dict[str, CommandStats], name: str):
+        found = stats.get(name, None)
+
+        if found is None:
+            found = stats[name] = CommandStats(self.bounds)
+        return found
+
+    def observe(self, command: str, cog: Optional[str],
+                timer: CommandTimer, failed: bool):
+        completed = time.perf_counter()
+
+        self._get_stats(self.commands, command).observe(timer, completed,
+                                                        failed)
+
+        if cog is not None:
+            self._get_stats(self.cogs, cog).observe(timer, completed, failed)
+
+    def to_dict(self):
+        return {
+            "commands": {name: stats.to_dict()
+                         for name, stats in self.commands.items()},
+            "cogs": {name: stats.to_dict()
+                     for name, stats in self.cogs.items()}
+        }
+
+    def merge(self, data: dict):
+        # only metrics recorded with the same bounds can be merged
+        for kind, stats in (("commands", self.commands),
+                            ("cogs", self.cogs)):
+            for name, found in data[kind].items():
+                self._get_stats(stats, name).merge(found)
+
+    def _render_histogram(self, name: str, labels: str,
+                          histogram: Histogram):
+        for bound, seen in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f'{name}_bucket{{{labels},le="{le}"}} {seen}'
+        yield f"{name}_sum{{{labels}}} {histogram.total}"
+        yield f"{name}_count{{{labels}}} {histogram.count}"
+
+    def _render_header(self, name: str, metric_type: str,
+                       description: str):
+        yield f"# HELP {name} {description}"
+        yield f"# TYPE {name} {metric_type}"
+
+    def _render_family(self, kind: str, stats: Dict[str, CommandStats]):
+        prefix = f"{self.namespace}_{kind}"
+        ordered = [(f'{kind}="{_escape(key)}"', found)
+                   for key, found in sorted(stats.items())]
+        name = f"{prefix}_latency_seconds"
+
+        yield from self._render_header(
+            name, "histogram", f"Time taken by each {kind}, from receipt"
+        )
+
+        for labels, found in ordered:
+            yield from self._render_histogram(name, labels, found.latency)
+        name = f"{prefix}_stage_seconds"
+
+        yield from self._render_header(
+            name, "histogram", f"Time taken by each {kind}, per stage"
+        )
+
+        for labels, found in ordered:
+            for stage, histogram in found.stages.items():
+                yield from self._render_histogram(
+                    name, f'{labels},stage="{stage}"', histogram
+                )
+        name = f"{prefix}_errors_total"
+
+        yield from self._render_header(
+            name, "counter", f"Failed invocations of each {kind}"
+        )
+
+        for labels, found in ordered:
+            yield f"{name}{{{labels}}} {found.errors}"
+
+    def render(self):
+        lines = [*self._render_family("command", self.commands),
+                 *self._render_family("cog", self.cogs)]
+        return ("\n").join(lines) + "\n"
+
+    def _write(self, path: str, rendered: str):
+        # replaced atomically, so scrapers never read a partial file
+        partial = f"{path}.part"
+
+        with open(partial, "w") as f:
+            f.write(rendered)
+        os.replace(partial, path)
+
+    async def write(self, path: str):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, path, self.render())
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9100):
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=self.render(),
+                                content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app)
+
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
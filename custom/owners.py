@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import FrozenSet, Iterable, Optional
+
+import discord
+
+
+class OwnerResolver(object):
+    def __init__(self, bot, *,
+                 owner_id: int = None,
+                 owner_ids: Iterable[int] = (),
+                 ttl: Optional[float] = 3600.0,
+                 retry_after: float = 60.0):
+        self.bot = bot
+        self.ids: FrozenSet[int] = frozenset(owner_ids)
+        self.application_id: int = None
+        self.team_id: int = None
+        self.ttl = ttl
+        self.retry_after = retry_after
+
+        if owner_id is not None:
+            self.ids |= {owner_id}
+        # explicitly passed owners never need resolving
+        self.static = bool(self.ids)
+        self._resolving: asyncio.Future = None
+        self._checked_at: float = None
+        self._failed_at: float = None
+
+    @property
+    def resolved(self):
+        return self.static or self.application_id is not None
+
+    @property
+    def stale(self):
+        if self.static or self.ttl is None or self._checked_at is None:
+            return False
+        return time.monotonic() - self._checked_at > self.ttl
+
+    @property
+    def backing_off(self):
+        if self._failed_at is None:
+            return False
+        return time.monotonic() - self._failed_at < self.retry_after
+
+    def is_owner_id(self, user_id: int) -> Optional[bool]:
+        # nobody is an owner until a failed resolve may be retried,
+        # rather than every check requesting application info again
+        if not self.resolved:
+            return False if self.backing_off else None
+
+        # answers keep coming from the last resolve while team
+        # membership is refreshed behind them
+        if self.stale:
+            self._start_fetch()
+        return user_id in self.ids
+
+    async def is_owner(self, user: discord.abc.User) -> bool:
+        is_owner = self.is_owner_id(user.id)
+
+        if is_owner is None:
+            is_owner = await self.bot.is_owner(user)
+        return is_owner
+
+    async def _fetch(self):
+        info = await self.bot.application_info()
+        team = info.team
+
+        if team:
+            ids = frozenset(member.id for member in team.members)
+        else:
+            ids = frozenset((info.owner.id,))
+        changed = (info.id != self.application_id or
+                   getattr(team, "id", None) != self.team_id or
+                   ids != self.ids)
+        self.application_id = info.id
+        self.team_id = getattr(team, "id", None)
+
+        if changed:
+            self.ids = ids
+
+            # mirrors what commands.Bot.is_owner caches
+            if team:
+                self.bot.owner_ids = set(ids)
+            else:
+                self.bot.owner_id = info.owner.id
+        return changed
+
+    def _fetched(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            self._failed_at = time.monotonic()
+            self.bot.log(f"[!] Failed to resolve owners: "
+                         f"{future.exception()}")
+        else:
+            self._failed_at = None
+
+    def _start_fetch(self):
+        # concurrent callers share a single application info request;
+        # a failed refresh is retried once the ttl is up again, and a
+        # failed first resolve once retry_after has passed
+        if self._resolving is None or self._resolving.done():
+            self._checked_at = time.monotonic()
+            self._resolving = asyncio.ensure_future(self._fetch())
+            self._resolving.add_done_callback(self._fetched)
+        return self._resolving
+
+    async def resolve(self, *, refresh: bool = False):
+        if self.static or (self.resolved and not refresh and not self.stale):
+            return self.ids
+
+        if not self.resolved and not refresh and self.backing_off:
+            return self.ids
+
+        await asyncio.shield(self._start_fetch())
+        return self.ids
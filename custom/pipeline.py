@@ -0,0 +1,35 @@
+from typing import Awaitable, Callable, Iterable, List
+
+import discord
+from discord.ext import commands
+
+Stage = Callable[[commands.Context], Awaitable[bool]]
+
+
+class MessagePipeline(object):
+    def __init__(self, bot, stages: Iterable[Stage] = ()):
+        self.bot = bot
+        self.stages: List[Stage] = list(stages)
+
+    def add_stage(self, stage: Stage, *, index: int = None):
+        if index is None:
+            self.stages.append(stage)
+        else:
+            self.stages.insert(index, stage)
+
+    def remove_stage(self, stage: Stage):
+        self.stages.remove(stage)
+
+    async def process(self, message: discord.Message):
+        # rejecting chatter happens before the first await, so messages
+        # unable to start with a prefix never reach command handling
+        if message.author.bot or self.bot.rejects(message):
+            return None
+        ctx = await self.bot.get_context(message)
+
+        # each stage may rewrite the context in place, returning True
+        # once the message has been fully handled
+        for stage in self.stages:
+            if await stage(ctx):
+                break
+        return ctx
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+Prefixes = Union[str, Iterable[str]]
+
+
+class PrefixMatcher(object):
+    __slots__ = ("prefixes", "_buckets", "_has_empty")
+
+    def __init__(self, prefixes: Prefixes):
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        buckets: Dict[str, list] = {}
+
+        self.prefixes: Tuple[str] = tuple(prefixes)
+        self._has_empty = "" in self.prefixes
+
+        # longest first, so the first hit within a bucket is also the
+        # longest prefix able to be matched
+        for prefix in sorted(set(self.prefixes), key=len, reverse=True):
+            if prefix:
+                buckets.setdefault(prefix[0], []).append(prefix)
+        self._buckets: Dict[str, Tuple[str]] = {
+            first: tuple(bucket) for first, bucket in buckets.items()
+        }
+
+    def __repr__(self):
+        return f"<PrefixMatcher prefixes={self.prefixes!r}>"
+
+    def rejects(self, content: str):
+        if self._has_empty:
+            return False
+        return not content or content[0] not in self._buckets
+
+    def match(self, content: str) -> Optional[str]:
+        if content:
+            for prefix in self._buckets.get(content[0], ()):
+                if content.startswith(prefix):
+                    return prefix
+        return "" if self._has_empty else None
+
+
+class PrefixMatcherCache(object):
+    # as large as the default PrefixStore, so every guild it caches
+    # keeps its matcher
+    def __init__(self, maximum: int = 10000):
+        self.maximum = maximum
+
+        self._cache: Dict[Tuple[str], PrefixMatcher] = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+
+    def get(self, prefixes: Prefixes) -> PrefixMatcher:
+        if isinstance(prefixes, PrefixMatcher):
+            return prefixes
+        # keyed by contents, as callables such as when_mentioned_or
+        # hand back a new list on every call
+        key = (prefixes,) if isinstance(prefixes, str) else tuple(prefixes)
+        matcher = self._cache.get(key, None)
+
+        if matcher is None:
+            matcher = self._cache[key] = PrefixMatcher(key)
+
+            if len(self._cache) > self.maximum:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return matcher
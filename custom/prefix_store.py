@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+Row = Tuple[int, str]
+
+
+class PrefixStore(object):
+    def __init__(self, path: str = "prefixes.sqlite3", *,
+                 default: Iterable[str] = (),
+                 maximum: int = 10000,
+                 flush_interval: float = 5.0,
+                 mentionable: bool = True):
+        self.path = path
+        self.default: Tuple[str] = tuple(default)
+        self.maximum = maximum
+        self.flush_interval = flush_interval
+        self.mentionable = mentionable
+
+        self._cache: Dict[int, Tuple[str]] = OrderedDict()
+        self._known: Set[int] = set()
+        self._pending: Dict[int, Optional[Tuple[str]]] = {}
+        self._mentions: Tuple[str] = ()
+        self._defaults: Tuple[str] = self.default
+        self._warmed = asyncio.Event()
+        self._loaded = False
+        self._flusher: asyncio.Task = None
+        self._connection: sqlite3.Connection = None
+        # a single worker keeps every query on the thread owning the
+        # connection, and off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def __call__(self, bot, message: discord.Message):
+        if not self._warmed.is_set():
+            await self._warmed.wait()
+        prefixes = self.get_nowait(bot, message)
+
+        # without a warm cache, every guild is looked up on its own
+        if prefixes is None:
+            if message.guild is None:
+                return self._defaults
+            prefixes = await self.fetch(message.guild.id)
+        return prefixes
+
+    # blocking helpers, only ever ran within the executor
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path,
+                                               check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS prefixes ("
+                                     "guild_id INTEGER PRIMARY KEY, "
+                                     "prefixes TEXT NOT NULL)")
+        return self._connection
+
+    def _select_all(self) -> List[Row]:
+        cursor = self._connect().execute("SELECT guild_id, prefixes "
+                                         "FROM prefixes")
+        return cursor.fetchall()
+
+    def _select(self, guild_id: int) -> Optional[Row]:
+        cursor = self._connect().execute("SELECT guild_id, prefixes "
+                                         "FROM prefixes WHERE guild_id = ?",
+                                         (guild_id,))
+        return cursor.fetchone()
+
+    def _write(self, batch: Dict[int, Optional[Tuple[str]]]):
+        upserts = []
+        deletions = []
+
+        for guild_id, prefixes in batch.items():
+            if prefixes is None:
+                deletions.append((guild_id,))
+            else:
+                upserts.append((guild_id, json.dumps(prefixes)))
+
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO prefixes "
+                                   "VALUES (?, ?)", upserts)
+            connection.executemany("DELETE FROM prefixes "
+                                   "WHERE guild_id = ?", deletions)
+
+    def _disconnect(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    def _compose(self, prefixes: Iterable[str]):
+        return (*prefixes, *self._mentions)
+
+    def _cache_prefixes(self, guild_id: int, prefixes: Tuple[str]):
+        self._cache[guild_id] = prefixes
+        self._cache.move_to_end(guild_id)
+
+        if len(self._cache) > self.maximum:
+            self._cache.popitem(last=False)
+        return prefixes
+
+    async def _flush_periodically(self, bot):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+
+            try:
+                await self.flush()
+            except sqlite3.Error as error:
+                bot.log(f"[!] Failed to flush prefixes: {error}")
+
+    async def start(self, bot):
+        if self.mentionable:
+            self._mentions = (f"<@{bot.user.id}> ", f"<@!{bot.user.id}> ")
+        self._defaults = self._compose(self.default)
+        self._flusher = asyncio.create_task(self._flush_periodically(bot))
+
+        # a failed warm up must not leave get_prefix waiting forever
+        try:
+            rows = await self._run(self._select_all)
+
+            for guild_id, prefixes in rows:
+                self._known.add(guild_id)
+
+                if len(self._cache) < self.maximum:
+                    self._cache[guild_id] = self._compose(
+                        json.loads(prefixes)
+                    )
+            self._loaded = True
+        finally:
+            self._warmed.set()
+
+    def get_nowait(self, bot, message: discord.Message):
+        if not self._loaded:
+            return None
+        elif message.guild is None:
+            return self._defaults
+        guild_id = message.guild.id
+        prefixes = self._cache.get(guild_id, None)
+
+        if prefixes is not None:
+            self._cache.move_to_end(guild_id)
+            return prefixes
+        elif guild_id in self._pending:
+            pending = self._pending[guild_id]
+
+            if pending is None:
+                return self._defaults
+            return self._cache_prefixes(guild_id, self._compose(pending))
+        elif guild_id not in self._known:
+            return self._defaults
+        # known to be stored, but evicted from the cache
+        return None
+
+    async def fetch(self, guild_id: int):
+        row = await self._run(self._select, guild_id)
+
+        if row is None:
+            self._known.discard(guild_id)
+            return self._defaults
+        prefixes = self._compose(json.loads(row[1]))
+        return self._cache_prefixes(guild_id, prefixes)
+
+    def set(self, guild_id: int, prefixes: Iterable[str]):
+        prefixes = tuple(prefixes)
+        self._pending[guild_id] = prefixes
+
+        self._known.add(guild_id)
+        self._cache_prefixes(guild_id, self._compose(prefixes))
+
+    def remove(self, guild_id: int):
+        self._pending[guild_id] = None
+        self._cache.pop(guild_id, None)
+
+        self._known.discard(guild_id)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = {}
+
+        try:
+            await self._run(self._write, batch)
+        except sqlite3.Error:
+            # newer writes win, failed ones are retried next flush
+            self._pending = {**batch, **self._pending}
+            raise
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+
+        # a failed final flush still releases the connection
+        try:
+            await self.flush()
+        finally:
+            await self._run(self._disconnect)
+            self._executor.shutdown(wait=False)
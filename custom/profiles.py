@@ -0,0 +1,88 @@
+from typing import Dict, Optional, Union
+
+import discord
+
+
+class Profile(object):
+    __slots__ = ("name", "intents", "member_cache", "chunk_guilds_at_startup",
+                 "max_messages")
+
+    def __init__(self, name: str, *,
+                 intents: Dict[str, bool],
+                 member_cache: Optional[Dict[str, bool]] = None,
+                 chunk_guilds_at_startup: bool = False,
+                 max_messages: Optional[int] = 1000):
+        self.name = name
+        # stored as flags, as intents and member cache flags are mutable
+        # and each bot needs its own
+        self.intents = intents
+        self.member_cache = member_cache
+        self.chunk_guilds_at_startup = chunk_guilds_at_startup
+        self.max_messages = max_messages
+
+    def __repr__(self):
+        return f"<Profile name={self.name!r}>"
+
+    def get_intents(self):
+        intents = discord.Intents.none()
+
+        for flag, value in self.intents.items():
+            setattr(intents, flag, value)
+        return intents
+
+    def get_member_cache_flags(self, intents: discord.Intents):
+        allowed = discord.MemberCacheFlags.from_intents(intents)
+
+        if self.member_cache is None:
+            return allowed
+        flags = discord.MemberCacheFlags.none()
+
+        # flags the intents cannot back are left off
+        for flag, value in self.member_cache.items():
+            setattr(flags, flag, value and getattr(allowed, flag))
+        return flags
+
+    def options(self, intents: discord.Intents = None):
+        # intents passed by the caller decide what can be cached
+        intents = intents or self.get_intents()
+
+        return {
+            "intents": intents,
+            "member_cache_flags": self.get_member_cache_flags(intents),
+            "chunk_guilds_at_startup": (self.chunk_guilds_at_startup and
+                                        intents.members),
+            "max_messages": self.max_messages
+        }
+
+
+ALL_INTENTS = {flag: True for flag in discord.Intents.VALID_FLAGS}
+PROFILES: Dict[str, Profile] = {
+    profile.name: profile for profile in (
+        Profile("full",
+                intents=ALL_INTENTS,
+                chunk_guilds_at_startup=True),
+        Profile("moderation",
+                intents=dict(guilds=True, members=True, bans=True,
+                             guild_messages=True, dm_messages=True,
+                             guild_reactions=True, voice_states=True),
+                # members are still dispatched, and fetched on demand
+                member_cache={},
+                chunk_guilds_at_startup=False,
+                max_messages=1000),
+        Profile("commands-only",
+                intents=dict(guilds=True, guild_messages=True,
+                             dm_messages=True, guild_reactions=True),
+                member_cache={},
+                max_messages=100),
+        Profile("minimal",
+                intents=dict(guilds=True, guild_messages=True),
+                member_cache={},
+                max_messages=None)
+    )
+}
+
+
+def get_profile(profile: Union[str, Profile]) -> Profile:
+    if isinstance(profile, Profile):
+        return profile
+    return PROFILES[profile]
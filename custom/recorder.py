@@ -0,0 +1,129 @@
+import asyncio
+import json
+import struct
+import time
+import zlib
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+MAGIC = b"BBEV"
+VERSION = 1
+COMPRESSED = 0x1
+# frame header: body length, then seconds since recording started
+FRAME = struct.Struct(">Id")
+REDACTED_KEYS = frozenset(("email", "phone", "token", "ip", "session_id"))
+RENAMED_KEYS = frozenset(("username", "global_name", "nick"))
+
+
+def redact_content(content: str):
+    # the first word is kept so commands still dispatch on replay
+    first, separator, rest = content.partition(" ")
+    return f"{first}{separator}{'x' * len(rest)}"
+
+
+def redact(data: Any):
+    if isinstance(data, dict):
+        redacted = {}
+
+        for key, value in data.items():
+            if key in REDACTED_KEYS:
+                value = None
+            elif key in RENAMED_KEYS and isinstance(value, str):
+                value = "redacted"
+            elif key == "content" and isinstance(value, str):
+                value = redact_content(value)
+            else:
+                value = redact(value)
+            redacted[key] = value
+        return redacted
+    elif isinstance(data, list):
+        return [redact(value) for value in data]
+    return data
+
+
+class EventRecorder(object):
+    def __init__(self, path: str, *,
+                 compress: bool = True,
+                 redactor: Optional[Callable[[Any], Any]] = redact,
+                 flush_every: int = 500):
+        self.path = path
+        self.compress = compress
+        self.redactor = redactor
+        self.flush_every = flush_every
+        self.recorded = 0
+        self.closed = False
+
+        self._started = time.monotonic()
+        self._frames: List[bytes] = []
+        self._compressor = zlib.compressobj() if compress else None
+        self._flushing: asyncio.Future = None
+
+        with open(self.path, "wb") as f:
+            f.write(MAGIC + bytes((VERSION, COMPRESSED if compress else 0)))
+
+    def _encode(self, event: str, data: Any):
+        if self.redactor:
+            data = self.redactor(data)
+        body = json.dumps({"t": event, "d": data},
+                          separators=(",", ":")).encode()
+        header = FRAME.pack(len(body), time.monotonic() - self._started)
+        return header + body
+
+    def _write(self, frames: List[bytes], final: bool = False):
+        chunk = b"".join(frames)
+
+        if self._compressor:
+            chunk = self._compressor.compress(chunk)
+            mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+            chunk += self._compressor.flush(mode)
+
+        with open(self.path, "ab") as f:
+            f.write(chunk)
+
+    async def _flush(self, final: bool = False):
+        # writes are serialised, keeping frames in their original order
+        if self._flushing:
+            await self._flushing
+        frames = self._frames
+        self._frames = []
+        loop = asyncio.get_running_loop()
+        self._flushing = loop.run_in_executor(None, self._write, frames,
+                                              final)
+        await self._flushing
+
+    async def on_socket_response(self, payload: dict):
+        if self.closed or payload.get("op") != 0:
+            return
+        self._frames.append(self._encode(payload["t"], payload["d"]))
+        self.recorded += 1
+
+        if len(self._frames) >= self.flush_every:
+            await self._flush()
+
+    async def close(self):
+        # the compressor cannot be finished twice
+        if self.closed:
+            return
+        self.closed = True
+        await self._flush(final=True)
+
+
+def read_events(path: str) -> Iterator[Tuple[float, str, Any]]:
+    with open(path, "rb") as f:
+        header = f.read(len(MAGIC) + 2)
+
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'"{path}" is not an event recording')
+        compressed = header[-1] & COMPRESSED
+        data = f.read()
+
+    if compressed:
+        data = zlib.decompressobj().decompress(data)
+    offset = 0
+
+    while offset + FRAME.size <= len(data):
+        length, elapsed = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        body = json.loads(data[offset:offset + length])
+        offset += length
+
+        yield elapsed, body["t"], body["d"]
@@ -0,0 +1,218 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List
+
+from .metrics import Histogram
+
+DEPTH_BOUNDS = (0, 1, 2, 4, 8, 16, 32, 64)
+MESSAGE_LIMIT = 2000
+
+Send = Callable[..., Awaitable[Any]]
+
+
+class TokenBucket(object):
+    __slots__ = ("rate", "per", "tokens", "updated")
+
+    def __init__(self, rate: int = 5, per: float = 5.0):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated: float = None
+
+    def _refill(self, now: float):
+        if self.updated is not None:
+            elapsed = now - self.updated
+            self.tokens = min(self.tokens + elapsed * self.rate / self.per,
+                              float(self.rate))
+        self.updated = now
+
+    def delay(self, now: float):
+        self._refill(now)
+
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def full(self, now: float):
+        self._refill(now)
+        return self.tokens >= self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class PendingSend(object):
+    __slots__ = ("send", "args", "kwargs", "future", "enqueued", "merged")
+
+    def __init__(self, send: Send, args: tuple, kwargs: dict,
+                 future: asyncio.Future, enqueued: float):
+        self.send = send
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = enqueued
+        # set once its content went out as part of another reply
+        self.merged = False
+
+    @property
+    def content(self):
+        # only replies made of nothing but text can be merged
+        if self.kwargs or len(self.args) != 1 or self.args[0] is None:
+            return None
+        return str(self.args[0])
+
+
+class ChannelQueue(object):
+    __slots__ = ("bucket", "pending", "space", "worker")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.pending: Deque[PendingSend] = deque()
+        self.space = asyncio.Event()
+        self.worker: asyncio.Task = None
+
+        self.space.set()
+
+
+class SendQueue(object):
+    def __init__(self, *, rate: int = 5, per: float = 5.0,
+                 max_depth: int = 20, coalesce: bool = True):
+        # mirrors discord's per-channel bucket for creating messages
+        self.rate = rate
+        self.per = per
+        self.max_depth = max_depth
+        self.coalesce = coalesce
+        self.wait = Histogram()
+        self.depth = Histogram(DEPTH_BOUNDS)
+        self.sent = 0
+        self.coalesced = 0
+
+        self._channels: Dict[int, ChannelQueue] = {}
+
+    def _get_channel(self, channel_id: int):
+        queue = self._channels.get(channel_id, None)
+
+        if queue is None:
+            bucket = TokenBucket(self.rate, self.per)
+            queue = self._channels[channel_id] = ChannelQueue(bucket)
+        return queue
+
+    def _take(self, queue: ChannelQueue, tight: bool):
+        first = queue.pending.popleft()
+        batch = [first]
+        content = first.content
+
+        if not (tight and self.coalesce) or content is None:
+            return batch, first.args
+
+        while queue.pending:
+            following = queue.pending[0].content
+
+            if (following is None or
+                    len(content) + len(following) + 1 > MESSAGE_LIMIT):
+                break
+            content = f"{content}\n{following}"
+            batch.append(queue.pending.popleft())
+        self.coalesced += len(batch) - 1
+        return batch, (content,)
+
+    async def _drain(self, channel_id: int, queue: ChannelQueue):
+        loop = asyncio.get_running_loop()
+
+        while queue.pending:
+            delay = queue.bucket.delay(loop.time())
+
+            # replies queued up meanwhile can be merged once awake
+            if delay:
+                await asyncio.sleep(delay)
+            queue.bucket.take(loop.time())
+            batch, args = self._take(queue, tight=delay > 0)
+
+            if len(queue.pending) < self.max_depth:
+                queue.space.set()
+            batch = [item for item in batch if not item.future.done()]
+
+            if not batch:
+                continue
+            now = loop.time()
+
+            for item in batch:
+                self.wait.observe(now - item.enqueued)
+            await self._deliver(batch, args)
+        # the bucket has to outlive its queue until it has refilled
+        loop.call_later(self.per, self._prune, channel_id)
+
+    def _prune(self, channel_id: int):
+        queue = self._channels.get(channel_id, None)
+        loop = asyncio.get_running_loop()
+
+        if (queue and not queue.pending and
+                (queue.worker is None or queue.worker.done()) and
+                queue.bucket.full(loop.time())):
+            del self._channels[channel_id]
+
+    async def _deliver(self, batch: List[PendingSend], args: tuple):
+        first = batch[0]
+
+        try:
+            message = await first.send(*args, **first.kwargs)
+        except Exception as error:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(error)
+        else:
+            self.sent += 1
+
+            for item in batch:
+                item.merged = item is not first
+
+                if not item.future.done():
+                    item.future.set_result(message)
+
+    def __len__(self):
+        return sum(len(queue.pending) for queue in self._channels.values())
+
+    def stats(self):
+        return {
+            "depth": len(self),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "wait_p50": self.wait.quantile(0.5),
+            "wait_p99": self.wait.quantile(0.99)
+        }
+
+    async def wait_for_capacity(self, channel_id: int):
+        queue = self._channels.get(channel_id, None)
+
+        while queue and len(queue.pending) >= self.max_depth:
+            await queue.space.wait()
+
+    def submit(self, channel_id: int, send: Send,
+               *args, **kwargs) -> PendingSend:
+        loop = asyncio.get_running_loop()
+        queue = self._get_channel(channel_id)
+        pending = PendingSend(send, args, kwargs, loop.create_future(),
+                              loop.time())
+
+        self.depth.observe(len(queue.pending))
+        queue.pending.append(pending)
+
+        if len(queue.pending) >= self.max_depth:
+            queue.space.clear()
+
+        if queue.worker is None or queue.worker.done():
+            queue.worker = loop.create_task(self._drain(channel_id, queue))
+        return pending
+
+    async def send(self, channel_id: int, send: Send, *args, **kwargs):
+        return await self.submit(channel_id, send, *args, **kwargs).future
+
+    def close(self):
+        for queue in self._channels.values():
+            if queue.worker:
+                queue.worker.cancel()
+
+            for item in queue.pending:
+                item.future.cancel()
+        self._channels.clear()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from .metrics import Histogram
+
+
+class HostMetrics(object):
+    __slots__ = ("requests", "errors", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+    def __repr__(self):
+        return (f"<HostMetrics requests={self.requests} "
+                f"errors={self.errors} latency={self.latency!r}>")
+
+
+class WebClient(object):
+    def __init__(self, *,
+                 limit: int = 100,
+                 limit_per_host: int = 10,
+                 dns_ttl: int = 300,
+                 keepalive_timeout: float = 30.0,
+                 timeout: Optional[float] = None,
+                 connect_timeout: float = 10.0,
+                 read_timeout: float = 30.0,
+                 **session_options):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        # no total by default, as that would also bound long downloads;
+        # a stalled transfer is caught by the read timeout instead
+        self.timeout = aiohttp.ClientTimeout(total=timeout,
+                                             connect=connect_timeout,
+                                             sock_read=read_timeout)
+        self.hosts: Dict[str, HostMetrics] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.dns_misses = 0
+
+        self._session: aiohttp.ClientSession = None
+        self._session_options = session_options
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    @property
+    def saturation(self):
+        return self.in_flight / self.limit if self.limit else 0.0
+
+    def _create_session(self):
+        # raises outside of a running loop, so the session and its
+        # connector are always bound to the loop using them
+        asyncio.get_running_loop()
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        trace = aiohttp.TraceConfig()
+
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_connection_queued_start.append(self._on_queued)
+        trace.on_dns_cache_miss.append(self._on_dns_cache_miss)
+
+        options = {**self._session_options}
+        options.setdefault("timeout", self.timeout)
+        options["trace_configs"] = [
+            *options.get("trace_configs", ()),
+            trace
+        ]
+        return aiohttp.ClientSession(connector=connector, **options)
+
+    def _get_host(self, params):
+        host = params.url.host
+        metrics = self.hosts.get(host, None)
+
+        if metrics is None:
+            metrics = self.hosts[host] = HostMetrics()
+        return metrics
+
+    async def _on_request_start(self, session, trace_ctx, params):
+        trace_ctx.started = time.perf_counter()
+        self.in_flight += 1
+
+    async def _on_request_end(self, session, trace_ctx, params):
+        metrics = self._get_host(params)
+        metrics.requests += 1
+        self.in_flight -= 1
+
+        metrics.latency.observe(time.perf_counter() - trace_ctx.started)
+
+    async def _on_request_exception(self, session, trace_ctx, params):
+        metrics = self._get_host(params)
+        metrics.requests += 1
+        metrics.errors += 1
+        self.in_flight -= 1
+
+    async def _on_queued(self, session, trace_ctx, params):
+        self.queued += 1
+
+    async def _on_dns_cache_miss(self, session, trace_ctx, params):
+        self.dns_misses += 1
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "saturation": self.saturation,
+            "queued": self.queued,
+            "dns_misses": self.dns_misses,
+            "hosts": {
+                host: {
+                    "requests": metrics.requests,
+                    "errors": metrics.errors,
+                    "p50": metrics.latency.quantile(0.5),
+                    "p99": metrics.latency.quantile(0.99)
+                }
+                for host, metrics in self.hosts.items()
+            }
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -1,16 +1,24 @@
+import asyncio
+import collections
 import contextlib
+import io
+import itertools
 import json
 import re
 import os
 import traceback
 from functools import wraps
-from typing import Callable, Iterable, Union
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple, Union)
 
 import discord
 
 from base import errors
 
 MULTIPLE_SPACES = re.compile(r" +")
+SIZE_UNITS = ("B", "KiB", "MiB", "GiB", "TiB")
+MESSAGE_LIMIT = 2000
+TRUNCATED = "\n(truncated)"
 
 
 def clear_screen():
@@ -34,51 +42,232 @@ def strip_multi_space(string: str):
     return MULTIPLE_SPACES.sub("", string)
 
 
-def codeblock(media: Union[str, Iterable], language: str = "py"):
+def iter_lines(media: Union[str, Iterable[str]]) -> Iterator[str]:
+    pieces = (media,) if isinstance(media, str) else media
+    pending = ""
+
+    # pieces may end mid-line, so whatever trails is carried over
+    for piece in pieces:
+        start = 0
+
+        while True:
+            end = piece.find("\n", start)
+
+            if end == -1:
+                break
+            yield pending + piece[start:end + 1]
+            pending = ""
+            start = end + 1
+        pending += piece[start:]
+
+    if pending:
+        yield pending
+
+
+def paginate(media: Union[str, Iterable[str]], *,
+             language: str = "py",
+             limit: int = MESSAGE_LIMIT) -> Iterator[str]:
+    opening = f"```{language}\n"
+    room = limit - len(opening) - len("\n```")
+    buffer: List[str] = []
+    size = 0
+
+    def wrap(text: str):
+        if text.endswith("\n"):
+            text = text[:-1]
+        return f"{opening}{text}\n```"
+
+    for line in iter_lines(media):
+        if size + len(line) > room and buffer:
+            yield wrap(("").join(buffer))
+            buffer.clear()
+            size = 0
+
+        # lines too long for any page are split wherever they must be
+        while len(line) > room:
+            yield wrap(line[:room])
+            line = line[room:]
+        buffer.append(line)
+        size += len(line)
+
+    if buffer:
+        yield wrap(("").join(buffer))
+
+
+def paginate_overflow(media: Union[str, Iterable[str]], *,
+                      language: str = "py",
+                      limit: int = MESSAGE_LIMIT,
+                      pages: int = 1,
+                      tail: bool = False) -> Tuple[List[str], Optional[str]]:
+    output = io.StringIO()
+
+    def recorded():
+        for line in iter_lines(media):
+            output.write(line)
+            yield line
+
+    lines = recorded()
+    paginated = paginate(lines, language=language, limit=limit)
+
+    if tail:
+        # only the last pages are kept, however many there are
+        shown = collections.deque(maxlen=pages)
+        total = 0
+
+        for page in paginated:
+            shown.append(page)
+            total += 1
+        overflowed = total > pages
+    else:
+        shown = list(itertools.islice(paginated, pages))
+        overflowed = next(paginated, None) is not None
+
+        # the remainder is only read into the text, never paginated
+        for _ in lines:
+            pass
+    return list(shown), output.getvalue() if overflowed else None
+
+
+def as_file(text: str, filename: str = "output.txt"):
+    return discord.File(io.BytesIO(text.encode()), filename=filename)
+
+
+def paginate_to_file(media: Union[str, Iterable[str]], *,
+                     filename: str = "output.txt",
+                     **kwargs) -> Tuple[List[str], Optional[discord.File]]:
+    shown, overflow = paginate_overflow(media, **kwargs)
+
+    if overflow is None:
+        return shown, None
+    return shown, as_file(overflow, filename)
+
+
+def codeblock(media: Union[str, Iterable], language: str = "py", *,
+              limit: int = MESSAGE_LIMIT):
     if isinstance(media, Iterable) and not isinstance(media, str):
-        media = json.dumps(media, indent=4)
-    return (f"```{language}\n"
-            f"{media}\n"
-            f"```")
+        media = json.JSONEncoder(indent=4).iterencode(media)
+    pages = paginate(media, language=language,
+                     limit=limit - len(TRUNCATED))
+    first = next(pages, f"```{language}\n\n```")
+
+    # only the first page is ever shown, so the rest is marked as cut
+    if next(pages, None) is not None:
+        first += TRUNCATED
+    return first
+
+
+def format_size(size: float):
+    for unit in SIZE_UNITS[:-1]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} {SIZE_UNITS[-1]}"
+
+
+def iter_exception(error: Exception) -> Iterator[str]:
+    return traceback.TracebackException.from_exception(error).format()
 
 
 def format_exception(error: Exception):
-    blueprint = traceback.format_exception(
-        type(error),
-        error,
-        error.__traceback__
-    )
-    return ("").join(blueprint)
+    return ("").join(iter_exception(error))
 
 
 # https://github.com/Rapptz/discord.py/blob/master/discord/ext/commands/core.py#L1784-L1808
 def has_intents(**intents):
+    # only marks what is required, so accessing the decorated attribute
+    # costs nothing; the requirements are checked by check_intents
     def outer(method: Callable):
-        def inner(*args, **kwargs):
-            missing = []
-            source = args[0]
-            bot = getattr(source, "bot", source)
-
-            for attr, value in intents.items():
-                intent_exists = getattr(bot.intents, attr, None)
-
-                if not intent_exists:
-                    continue
-                elif intent_exists is not value:
-                    missing.append(attr)
-
-            if missing:
-                error = errors.IntentsRequired(*missing)
-                bot.dispatch("base_error", error)
-            return method(*args, **kwargs)
-        return inner
+        method.__intents__ = {**getattr(method, "__intents__", {}),
+                              **intents}
+        return method
     return outer
 
 
-async def clear_reactions(message: discord.Message):
-    try:
-        await message.clear_reactions()
-    except discord.Forbidden:
-        with contextlib.suppress(discord.HTTPException):
-            for reaction in message.reactions:
-                await message.remove_reaction(reaction, message.guild.me)
+def get_required_intents(cls: type) -> Dict[str, bool]:
+    required = {}
+
+    for klass in reversed(cls.__mro__):
+        for attribute in vars(klass).values():
+            if isinstance(attribute, property):
+                attribute = attribute.fget
+            # commands carry their requirements on their callbacks
+            attribute = getattr(attribute, "callback", attribute)
+            required.update(getattr(attribute, "__intents__", {}))
+    return required
+
+
+def check_intents(bot, source=None):
+    missing = []
+    source = bot if source is None else source
+    required = get_required_intents(type(source))
+
+    for attr, value in required.items():
+        if bool(getattr(bot.intents, attr, False)) is not value:
+            missing.append(attr)
+
+    if missing:
+        error = errors.IntentsRequired(*missing)
+        bot.dispatch("base_error", error)
+    return missing
+
+
+class ReactionsCleared(object):
+    __slots__ = ("bulk", "removed", "failed")
+
+    def __init__(self, *, bulk: bool = False):
+        self.bulk = bulk
+        self.removed: List[Any] = []
+        self.failed: List[Tuple[Any, discord.HTTPException]] = []
+
+    @property
+    def complete(self):
+        return not self.failed
+
+
+async def clear_reactions(message: discord.Message,
+                          member: discord.abc.Snowflake = None, *,
+                          concurrency: int = 4):
+    member = member or getattr(message.guild, "me", None)
+    manage_messages = False
+
+    # an uncached member is treated as lacking manage_messages, just
+    # like a bulk clear which turned out to be forbidden
+    if member is not None:
+        permissions = message.channel.permissions_for(member)
+        manage_messages = permissions.manage_messages
+
+    # a request bound to be forbidden is not worth its round-trip
+    if manage_messages:
+        with contextlib.suppress(discord.Forbidden):
+            await message.clear_reactions()
+            return ReactionsCleared(bulk=True)
+    cleared = ReactionsCleared()
+
+    # partial messages carry no reactions until fetched
+    if not hasattr(message, "reactions"):
+        try:
+            message = await message.fetch()
+        except discord.NotFound:
+            raise
+        except discord.HTTPException as error:
+            cleared.failed.append((None, error))
+            return cleared
+    # without manage_messages, only the bot's own reactions can go
+    emojis = list(dict.fromkeys(reaction.emoji
+                                for reaction in message.reactions
+                                if reaction.me))
+    semaphore = asyncio.Semaphore(concurrency)
+    # removing the client's own reactions needs no member
+    member = member or message._state.user
+
+    async def remove(emoji):
+        async with semaphore:
+            try:
+                await message.remove_reaction(emoji, member)
+            except discord.HTTPException as error:
+                cleared.failed.append((emoji, error))
+            else:
+                cleared.removed.append(emoji)
+
+    await asyncio.gather(*map(remove, emojis))
+    return cleared